@@ -9,7 +9,7 @@ import asyncio
 import logging
 from datetime import datetime
 from functools import partial
-from typing import Final
+from typing import Any, Final
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
@@ -26,37 +26,69 @@ from homeassistant.const import (
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers import discovery
-from homeassistant.helpers.dispatcher import async_dispatcher_send
-from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.helpers.importlib import async_import_module
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import ConfigType
 from pywattbox.base import BaseWattBox
 
+from .connection import (
+    async_close_wattbox,
+    async_load_wattbox,
+    async_pop_handoff,
+)
 from .const import (
+    BACKOFF_MAX,
     BINARY_SENSOR_TYPES,
+    CONF_FLEET,
+    CONF_MAX_SCAN_INTERVAL,
     CONF_NAME_REGEXP,
     CONF_SKIP_REGEXP,
+    CONF_STAGGER,
+    CONF_STALE_AFTER,
+    CONF_TAG,
+    DEFAULT_MAX_SCAN_INTERVAL,
     DEFAULT_NAME,
     DEFAULT_PASSWORD,
     DEFAULT_PORT,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STAGGER,
+    DEFAULT_STALE_AFTER,
     DEFAULT_USER,
     DOMAIN,
     DOMAIN_DATA,
+    OUTLET_METERING,
     PLATFORMS,
     SENSOR_TYPES,
+    SETUP_CONCURRENCY,
+    SETUP_RETRY_DELAY,
+    SETUP_TIMEOUT,
     STARTUP,
-    TOPIC_UPDATE,
 )
+from .coordinator import WattBoxCoordinator
+from .services import async_setup_services
 
 REQUIREMENTS: Final[list[str]] = ["pywattbox>=0.7.2"]
 
 _LOGGER = logging.getLogger(__name__)
 
-ALL_SENSOR_TYPES: Final[list[str]] = [*BINARY_SENSOR_TYPES.keys(), *SENSOR_TYPES.keys()]
+ALL_SENSOR_TYPES: Final[list[str]] = [
+    *BINARY_SENSOR_TYPES.keys(),
+    *SENSOR_TYPES.keys(),
+    OUTLET_METERING,
+]
+
+# Shared by YAML and config entries, which store them as JSON values.
+POLLING_SCHEMA: Final[dict[vol.Marker, Any]] = {
+    vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): cv.time_period,
+    vol.Optional(
+        CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL
+    ): cv.time_period,
+    vol.Optional(CONF_STALE_AFTER, default=DEFAULT_STALE_AFTER): cv.time_period,
+    vol.Optional(CONF_STAGGER, default=DEFAULT_STAGGER): cv.boolean,
+}
 
 WATTBOX_HOST_SCHEMA = vol.Schema(
     {
+        **POLLING_SCHEMA,
         vol.Required(CONF_HOST): cv.string,
         vol.Optional(CONF_PORT, default=DEFAULT_PORT): int,
         vol.Optional(CONF_USERNAME, default=DEFAULT_USER): cv.string,
@@ -67,7 +99,7 @@ WATTBOX_HOST_SCHEMA = vol.Schema(
         vol.Optional(CONF_RESOURCES, default=ALL_SENSOR_TYPES): vol.All(
             cv.ensure_list, [vol.In(ALL_SENSOR_TYPES)]
         ),
-        vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): cv.time_period,
+        vol.Optional(CONF_TAG): cv.string,
     }
 )
 
@@ -79,44 +111,19 @@ CONFIG_SCHEMA = vol.Schema(
 )
 
 
-async def _async_create_wattbox(
-    hass: HomeAssistant, host: str, port: int, username: str, password: str
-) -> BaseWattBox:
-    """Create a WattBox instance based on port (IP or HTTP)."""
-    if port in (22, 23):
-        _LOGGER.debug("Importing IP Wattbox")
-        from pywattbox.ip_wattbox import async_create_ip_wattbox
-
-        # Pre-import the transport plugin to avoid blocking call issues
-        transport = "asyncssh" if port == 22 else "asynctelnet"
-        await async_import_module(
-            hass, f"scrapli.transport.plugins.{transport}.transport"
-        )
-
-        _LOGGER.debug("Creating IP WattBox")
-        wattbox: BaseWattBox = await async_create_ip_wattbox(
-            host=host, user=username, password=password, port=port
-        )
-    else:
-        _LOGGER.debug("Importing HTTP Wattbox")
-        from pywattbox.http_wattbox import async_create_http_wattbox
-
-        # Pre-import the encoding to avoid blocking call issues
-        await async_import_module(hass, "encodings.ascii")
-
-        _LOGGER.debug("Creating HTTP WattBox")
-        wattbox = await async_create_http_wattbox(
-            host=host, user=username, password=password, port=port
-        )
-
-    return wattbox
-
-
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up this component."""
     _LOGGER.info(STARTUP)
 
     hass.data[DOMAIN_DATA] = {}
+    async_setup_services(hass)
+
+    # The fleet totals live as long as Home Assistant, not any one WattBox.
+    hass.async_create_task(
+        discovery.async_load_platform(
+            hass, "sensor", DOMAIN, {CONF_FLEET: True}, config
+        )
+    )
 
     # Only process YAML config if it exists
     domain_config = config.get(DOMAIN, [])
@@ -127,62 +134,103 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     else:
         _LOGGER.debug("No YAML configuration found, will rely on config entries")
 
-    for wattbox_host in domain_config:
-        _LOGGER.debug(repr(wattbox_host))
-        # Create DATA dict
-        host = wattbox_host.get(CONF_HOST)
-        password = wattbox_host.get(CONF_PASSWORD)
-        port = wattbox_host.get(CONF_PORT)
-        username = wattbox_host.get(CONF_USERNAME)
-        name = wattbox_host.get(CONF_NAME)
-
-        wattbox: BaseWattBox
-        try:
-            wattbox = await _async_create_wattbox(hass, host, port, username, password)
-        except Exception as error:
-            _LOGGER.error("Error creating WattBox instance: %s", error)
-            raise PlatformNotReady from error
-
-        hass.data[DOMAIN_DATA][name] = wattbox
-
-        # Load platforms
-        for platform in PLATFORMS:
-            # Get platform specific configuration
-            hass.async_create_task(
-                discovery.async_load_platform(
-                    hass, platform, DOMAIN, wattbox_host, config
-                )
-            )
-
-        # Use the scan interval to trigger updates
-        scan_interval = wattbox_host.get(CONF_SCAN_INTERVAL)
-        async_track_time_interval(
-            hass, partial(update_data, hass=hass, name=name), scan_interval
+    # Set up the hosts concurrently, so one slow WattBox does not hold up
+    # the rest. Failing hosts keep retrying in the background.
+    semaphore = asyncio.Semaphore(SETUP_CONCURRENCY)
+    await asyncio.gather(
+        *(
+            _async_setup_host(hass, config, wattbox_host, semaphore)
+            for wattbox_host in domain_config
         )
+    )
 
-    # Extra logging to ensure the right outlets are set up.
-    _LOGGER.debug(", ".join([str(v) for _, v in hass.data[DOMAIN_DATA].items()]))
-    _LOGGER.debug(repr(hass.data[DOMAIN_DATA]))
-    for _, wattbox in hass.data[DOMAIN_DATA].items():
-        _LOGGER.debug("%s has %s outlets", wattbox, len(wattbox.outlets))
-        for outlet in wattbox.outlets:
-            _LOGGER.debug("Outlet: %s - %s", outlet, repr(outlet))
+    # Extra logging to ensure the right outlets are set up. Skipped entirely
+    # without debug logging, it walks every outlet of every WattBox.
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        for coordinator in hass.data[DOMAIN_DATA].values():
+            wattbox = coordinator.wattbox
+            _LOGGER.debug("%s has %s outlets", wattbox, len(wattbox.outlets))
+            for outlet in wattbox.outlets.values():
+                _LOGGER.debug("Outlet: %s - %r", outlet, outlet)
 
     return True
 
 
-async def update_data(_dt: datetime, hass: HomeAssistant, name: str) -> None:
-    """Update data."""
-
-    # This is where the main logic to update platform data goes.
+async def _async_release(
+    hass: HomeAssistant,
+    coordinator: WattBoxCoordinator | None,
+    wattbox: BaseWattBox | None,
+) -> None:
+    """Release what a failed setup got to, the retry makes new ones.
+
+    Otherwise repeated failures use up the session slots of the host.
+    """
+    if coordinator is not None:
+        await coordinator.async_shutdown()
+    elif wattbox is not None:
+        await async_close_wattbox(hass, wattbox)
+
+
+async def _async_setup_host(
+    hass: HomeAssistant,
+    config: ConfigType,
+    wattbox_host: ConfigType,
+    semaphore: asyncio.Semaphore,
+    attempt: int = 0,
+) -> None:
+    """Set up a single YAML configured WattBox."""
+    # Create DATA dict
+    host = wattbox_host[CONF_HOST]
+    password = wattbox_host[CONF_PASSWORD]
+    port = wattbox_host[CONF_PORT]
+    username = wattbox_host[CONF_USERNAME]
+    name = wattbox_host[CONF_NAME]
+    _LOGGER.debug("Setting up %s at %s:%s", name, host, port)
+
+    wattbox: BaseWattBox | None = None
+    coordinator: WattBoxCoordinator | None = None
     try:
-        wattbox = hass.data[DOMAIN_DATA][name]
-        await wattbox.async_update()
-        _LOGGER.debug("Updated: %s - %s", wattbox, repr(wattbox))
-        # Send update to topic for entities to see
-        async_dispatcher_send(hass, TOPIC_UPDATE.format(DOMAIN, name))
+        async with semaphore, asyncio.timeout(SETUP_TIMEOUT):
+            wattbox, restored = await async_load_wattbox(
+                hass, name, host, port, username, password
+            )
+            coordinator = WattBoxCoordinator(hass, name, wattbox, restored)
+            await coordinator.async_setup()
     except Exception as error:
-        _LOGGER.error("Could not update data for %s (%s) - %s", repr(wattbox), wattbox, error)
+        await _async_release(hass, coordinator, wattbox)
+        delay = min(SETUP_RETRY_DELAY * 2**attempt, BACKOFF_MAX)
+        _LOGGER.error(
+            "Error creating WattBox instance for %s, retrying in %s: %s",
+            name,
+            delay,
+            error,
+        )
+
+        async def _async_retry(_now: datetime) -> None:
+            """Try setting up the WattBox again."""
+            await _async_setup_host(hass, config, wattbox_host, semaphore, attempt + 1)
+
+        async_call_later(hass, delay, _async_retry)
+        return
+
+    hass.data[DOMAIN_DATA][name] = coordinator
+
+    # Load platforms
+    for platform in PLATFORMS:
+        # Get platform specific configuration
+        hass.async_create_task(
+            discovery.async_load_platform(hass, platform, DOMAIN, wattbox_host, config)
+        )
+
+    # Use the scan interval to trigger updates
+    coordinator.async_start(
+        wattbox_host[CONF_SCAN_INTERVAL],
+        wattbox_host[CONF_MAX_SCAN_INTERVAL],
+        wattbox_host[CONF_STALE_AFTER],
+        wattbox_host[CONF_STAGGER],
+        wattbox_host[CONF_RESOURCES],
+        wattbox_host.get(CONF_TAG),
+    )
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -196,23 +244,48 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     username = entry.data[CONF_USERNAME]
     password = entry.data[CONF_PASSWORD]
     name = entry.data[CONF_NAME]
-    scan_interval = entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    # Options, once set, win over what was entered when adding the WattBox.
+    polling = vol.Schema(POLLING_SCHEMA, extra=vol.REMOVE_EXTRA)(
+        {**entry.data, **entry.options}
+    )
 
-    wattbox: BaseWattBox
+    # Adopt the connection from the config flow if it is still fresh, its
+    # first update also provides the initial entity states. Otherwise start
+    # from the stored snapshot, so a WattBox that is down does not hold up
+    # the entry.
+    wattbox: BaseWattBox | None = async_pop_handoff(
+        hass, host, port, username, password
+    )
+    restored = False
+    coordinator: WattBoxCoordinator | None = None
     try:
-        wattbox = await _async_create_wattbox(hass, host, port, username, password)
+        if wattbox is None:
+            wattbox, restored = await async_load_wattbox(
+                hass, name, host, port, username, password
+            )
+        coordinator = WattBoxCoordinator(hass, name, wattbox, restored)
+        await coordinator.async_setup()
     except Exception as error:
         _LOGGER.error("Error creating WattBox instance: %s", error)
+        await _async_release(hass, coordinator, wattbox)
         raise PlatformNotReady from error
 
-    hass.data[DOMAIN_DATA][name] = wattbox
+    hass.data[DOMAIN_DATA][name] = coordinator
+    coordinator.on_identity_changed = partial(
+        hass.config_entries.async_schedule_reload, entry.entry_id
+    )
 
     # Forward entry setup to platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     # Use the scan interval to trigger updates
-    async_track_time_interval(
-        hass, partial(update_data, hass=hass, name=name), scan_interval
+    coordinator.async_start(
+        polling[CONF_SCAN_INTERVAL],
+        polling[CONF_MAX_SCAN_INTERVAL],
+        polling[CONF_STALE_AFTER],
+        polling[CONF_STAGGER],
+        resources=entry.data.get(CONF_RESOURCES, ALL_SENSOR_TYPES),
+        tag=entry.data.get(CONF_TAG) or None,
     )
 
     return True
@@ -233,8 +306,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
 
     if unload_ok:
-        # Remove the wattbox from data
-        if name in hass.data[DOMAIN_DATA]:
-            del hass.data[DOMAIN_DATA][name]
+        # Stop polling and remove the wattbox from data
+        if (coordinator := hass.data[DOMAIN_DATA].pop(name, None)) is not None:
+            await coordinator.async_shutdown()
 
     return unload_ok
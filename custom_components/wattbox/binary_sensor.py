@@ -5,7 +5,7 @@ import logging
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME, CONF_RESOURCES
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
@@ -90,11 +90,14 @@ class WattBoxBinarySensor(WattBoxEntity, BinarySensorEntity):
         self._attr_unique_id = (
             f"{self._wattbox.serial_number}-bsensor-{self.sensor_type}"
         )
+        self._snapshot_keys = (sensor_type,)
+        self._async_update_attrs()
 
-    async def async_update(self) -> None:
+    @callback
+    def _async_update_attrs(self) -> None:
         """Update the sensor."""
         # Check the data and update the value.
-        value: bool | None = getattr(self._wattbox, self.sensor_type, None)
+        value: bool | None = self.coordinator.data.get(self.sensor_type)
         if value is not None and self._flipped:
             value = not value
         self._attr_is_on = value
@@ -6,13 +6,14 @@ import re
 from homeassistant.components.button import ButtonDeviceClass, ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME, EntityCategory
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
-from pywattbox.base import BaseWattBox, Outlet
+from pywattbox.base import BaseWattBox, Commands, Outlet
 
 from .const import CONF_NAME_REGEXP, CONF_SKIP_REGEXP, DOMAIN_DATA, RESTART_ICON
+from .coordinator import outlet_key
 from .entity import WattBoxEntity
 from .switch import validate_regex
 
@@ -27,7 +28,7 @@ async def async_setup_entry(
         name: str = entry.data[CONF_NAME]
 
         entities: list[WattBoxEntity] = []
-        wattbox: BaseWattBox = hass.data[DOMAIN_DATA][name]
+        wattbox: BaseWattBox = hass.data[DOMAIN_DATA][name].wattbox
 
         # For config entries, we'll include all outlets by default
         # TODO: Add options for name_regexp and skip_regexp in config flow
@@ -69,7 +70,7 @@ async def async_setup_platform(
     name: str = discovery_info[CONF_NAME]
 
     entities: list[WattBoxEntity] = []
-    wattbox: BaseWattBox = hass.data[DOMAIN_DATA][name]
+    wattbox: BaseWattBox = hass.data[DOMAIN_DATA][name].wattbox
 
     name_regexp = validate_regex(config, CONF_NAME_REGEXP)
     skip_regexp = validate_regex(config, CONF_SKIP_REGEXP)
@@ -101,34 +102,44 @@ class WattBoxResetButton(WattBoxEntity, ButtonEntity):
 
     _attr_device_class = ButtonDeviceClass.RESTART
     _attr_should_poll = False
-    _outlet: Outlet
 
     def __init__(
         self, hass: HomeAssistant, name: str, index: int, outlet_name: str = ""
     ) -> None:
         super().__init__(hass, name, index)
-        # Master Outlet (index == 0) is not in the oulets dict
-        if index:
-            self._outlet = self._wattbox.outlets[index]
+        self._index = index
         # Determine outlet name
         if outlet_name := outlet_name.strip():
             self._attr_name = f"{name} {outlet_name} Reset"
         else:
             self._attr_name = f"{name} Outlet {index} Reset"
         self._attr_unique_id = f"{self._wattbox.serial_number}-button-reset-{index}"
-
-    async def async_update(self) -> None:
+        self._name_key = outlet_key(index, "name")
+        self._method_key = outlet_key(index, "method")
+        self._snapshot_keys = (self._name_key, self._method_key)
+        # Static, so it is set once instead of on every update.
+        self._attr_extra_state_attributes["index"] = index
+        self._async_update_attrs()
+
+    @callback
+    def _async_update_attrs(self) -> None:
         """Update the sensor."""
         # Set/update attributes
-        self._attr_extra_state_attributes["name"] = self._outlet.name
-        self._attr_extra_state_attributes["method"] = self._outlet.method
-        self._attr_extra_state_attributes["index"] = self._outlet.index
+        data = self.coordinator.data
+        self._attr_extra_state_attributes["name"] = data.get(self._name_key)
+        self._attr_extra_state_attributes["method"] = data.get(self._method_key)
+
+    @property
+    def _outlet(self) -> Outlet:
+        """Return the outlet, the initial update replaces the Outlet objects."""
+        return self._wattbox.outlets[self._index]
 
     async def async_press(self) -> None:
         """Issue a reset to the outlet."""
         _LOGGER.debug("Resetting On: %s - %s", self._wattbox, self._outlet)
-        # Trigger the action on the wattbox.
-        await self._outlet.async_reset()
+        # Trigger the action on the wattbox. The outlet shows as off until
+        # it is read back on.
+        await self.coordinator.async_send_command(self._outlet, Commands.RESET)
 
     @property
     def icon(self) -> str | None:
@@ -0,0 +1,195 @@
+"""Outlet command queue for wattbox."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from datetime import datetime
+from functools import partial
+from typing import Final, cast
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from pywattbox.base import BaseWattBox, Commands, Outlet
+
+from .const import COMMAND_BATCH_WINDOW
+from .session import WattBoxSession
+
+_LOGGER = logging.getLogger(__name__)
+
+# Commands that set the outlet state, a later one replaces an earlier one.
+SWITCH_COMMANDS: Final[frozenset[Commands]] = frozenset((Commands.ON, Commands.OFF))
+
+# Looked up by name so subclasses such as the HTTP MasterSwitch are respected.
+_OUTLET_METHODS: Final[dict[Commands, str]] = {
+    Commands.ON: "async_turn_on",
+    Commands.OFF: "async_turn_off",
+    Commands.RESET: "async_reset",
+}
+
+
+class _PendingCommand:
+    """A command waiting to be sent, and everyone waiting on it."""
+
+    __slots__ = ("command", "futures", "outlet")
+
+    def __init__(
+        self, outlet: Outlet, command: Commands, future: asyncio.Future[None]
+    ) -> None:
+        self.outlet = outlet
+        self.command = command
+        self.futures = [future]
+
+
+class WattBoxCommandQueue:
+    """Batch and serialize the outlet commands for a single WattBox.
+
+    Commands arriving within COMMAND_BATCH_WINDOW of each other are sent
+    together in one session job. An on/off for an outlet that still has an
+    on/off pending replaces it, so only the last one is sent and both
+    callers get its result.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, wattbox: BaseWattBox, session: WattBoxSession
+    ) -> None:
+        self.hass = hass
+        self.wattbox = wattbox
+        self.session = session
+        self._pending: dict[int, list[_PendingCommand]] = {}
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        # Called with the seconds each batch took to send.
+        self.on_latency: Callable[[float], None] | None = None
+        # Called with the commands of each batch once it was sent, or failed.
+        self.on_sent: Callable[[list[Commands]], None] | None = None
+
+    async def async_send(self, outlet: Outlet, command: Commands) -> None:
+        """Queue a command for an outlet and wait for its result."""
+        future: asyncio.Future[None] = self.hass.loop.create_future()
+        queued = self._pending.setdefault(outlet.index, [])
+        if (
+            queued
+            and queued[-1].command in SWITCH_COMMANDS
+            and command in SWITCH_COMMANDS
+        ):
+            _LOGGER.debug(
+                "Outlet %s: %s supersedes %s",
+                outlet.index,
+                command.name,
+                queued[-1].command.name,
+            )
+            queued[-1].command = command
+            queued[-1].futures.append(future)
+        else:
+            queued.append(_PendingCommand(outlet, command, future))
+
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass, COMMAND_BATCH_WINDOW, self._async_flush
+            )
+        await future
+
+    @callback
+    def _async_flush(self, _now: datetime) -> None:
+        """Send everything queued so far as one batch."""
+        self._unsub_flush = None
+        batch = [pending for queued in self._pending.values() for pending in queued]
+        self._pending = {}
+        self.hass.async_create_task(
+            self._async_send_batch(batch), "wattbox outlet commands"
+        )
+
+    async def _async_send_batch(self, batch: list[_PendingCommand]) -> None:
+        """Send a batch and hand each caller the result for its outlet."""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Sending %s command(s) to %s: %s",
+                len(batch),
+                self.wattbox,
+                [(pending.outlet.index, pending.command.name) for pending in batch],
+            )
+        start = time.monotonic()
+        try:
+            errors = await self.session.async_run(partial(self._async_execute, batch))
+        except Exception as err:
+            errors = [err] * len(batch)
+        else:
+            if self.on_latency is not None:
+                self.on_latency(time.monotonic() - start)
+        if self.on_sent is not None:
+            self.on_sent([pending.command for pending in batch])
+
+        for pending, error in zip(batch, errors, strict=True):
+            for future in pending.futures:
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(
+                        CommandFailed(
+                            f"{pending.command.name} failed for outlet "
+                            f"{pending.outlet.index}: {error}"
+                        )
+                    )
+
+    async def _async_execute(
+        self, batch: list[_PendingCommand]
+    ) -> list[Exception | None]:
+        """Run a batch on the WattBox, returning the error of each command."""
+        # The IP protocol takes plain OutletSet requests on the open session.
+        # The outlet methods would run a full update after every command.
+        if self.wattbox.port in (22, 23):
+            from pywattbox.ip_wattbox import CONTROL_MESSAGES, IpWattBox
+
+            responses = await cast(IpWattBox, self.wattbox).async_send_requests(
+                CONTROL_MESSAGES.OUTLET_SET.value.format(
+                    outlet=pending.outlet.index, action=pending.command.name, delay=0
+                )
+                for pending in batch
+            )
+            return [
+                CommandFailed(response.result) if response.failed else None
+                for response in responses
+            ]
+
+        errors: list[Exception | None] = []
+        for pending in batch:
+            try:
+                await self._async_execute_one(pending)
+            except Exception as err:
+                errors.append(err)
+            else:
+                errors.append(None)
+        return errors
+
+    async def _async_execute_one(self, pending: _PendingCommand) -> None:
+        """Send a single command through the outlet."""
+        # The HTTP master switch has to go through the WattBox, its Outlet
+        # methods only cover turning it on.
+        if pending.outlet.index == 0 and pending.command in SWITCH_COMMANDS:
+            send_master_command = getattr(
+                self.wattbox, "async_send_master_command", None
+            )
+            if send_master_command is not None:
+                await send_master_command(pending.command)
+                return
+        await getattr(pending.outlet, _OUTLET_METHODS[pending.command])()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Fail anything still queued."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        for queued in self._pending.values():
+            for pending in queued:
+                for future in pending.futures:
+                    if not future.done():
+                        future.set_exception(CommandFailed("WattBox was unloaded"))
+        self._pending = {}
+
+
+class CommandFailed(HomeAssistantError):
+    """Error to indicate an outlet command failed."""
@@ -13,9 +13,10 @@ from homeassistant.const import (
     CONF_USERNAME,
 )
 from homeassistant.core import HomeAssistant
-from pywattbox.base import BaseWattBox
 
+from .connection import async_create_wattbox, async_store_handoff
 from .const import (
+    CONF_TAG,
     DEFAULT_NAME,
     DEFAULT_PASSWORD,
     DEFAULT_PORT,
@@ -39,21 +40,8 @@ async def validate_input(hass: HomeAssistant, data: dict) -> dict:
 
     # Try to create a connection to validate the input
     try:
-        if port in (22, 23):
-            from pywattbox.ip_wattbox import async_create_ip_wattbox
-
-            wattbox: BaseWattBox = await async_create_ip_wattbox(
-                host=host, user=username, password=password, port=port
-            )
-        else:
-            from pywattbox.http_wattbox import async_create_http_wattbox
-
-            wattbox = await async_create_http_wattbox(
-                host=host, user=username, password=password, port=port
-            )
-
-        # Try to get basic info to validate connection
-        await wattbox.async_update()
+        # Creating the WattBox runs a full update, which validates the input.
+        wattbox = await async_create_wattbox(hass, host, port, username, password)
 
         config = {
             "title": name,
@@ -65,6 +53,8 @@ async def validate_input(hass: HomeAssistant, data: dict) -> dict:
             "serial_number": wattbox.serial_number,
         }
         _LOGGER.debug("generated config data: %s", config)
+        # Hand the connection over to the entry setup instead of dropping it
+        async_store_handoff(hass, wattbox, username, password)
         return config
     except Exception as exc:
         _LOGGER.error("Error connecting to WattBox %s: %s", host, exc)
@@ -106,6 +96,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(CONF_USERNAME, default=DEFAULT_USER): str,
                 vol.Optional(CONF_PASSWORD, default=DEFAULT_PASSWORD): str,
                 vol.Required(CONF_NAME, default=DEFAULT_NAME): str,
+                vol.Optional(CONF_TAG): str,
             }
         )
 
@@ -0,0 +1,191 @@
+"""Connection handling for wattbox."""
+
+import logging
+from datetime import datetime
+from types import ModuleType
+from typing import TYPE_CHECKING, Final, TypedDict, cast
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.importlib import async_import_module
+from pywattbox.base import BaseWattBox, Outlet
+
+from .const import DOMAIN_HANDOFF, HANDOFF_TTL
+from .coordinator import apply_snapshot
+from .session import create_session
+from .store import StoredSnapshot, async_get_snapshot_store
+
+if TYPE_CHECKING:
+    from pywattbox.http_wattbox import HttpWattBox
+    from pywattbox.ip_wattbox import IpWattBox
+
+_LOGGER = logging.getLogger(__name__)
+
+# Modules to import for each port, None being HTTP. The first is the
+# pywattbox module, the rest are imported by it on first use.
+TRANSPORT_MODULES: Final[dict[int | None, tuple[str, ...]]] = {
+    22: ("pywattbox.ip_wattbox", "scrapli.transport.plugins.asyncssh.transport"),
+    23: ("pywattbox.ip_wattbox", "scrapli.transport.plugins.asynctelnet.transport"),
+    None: ("pywattbox.http_wattbox", "encodings.ascii"),
+}
+
+
+class _Handoff(TypedDict):
+    wattbox: BaseWattBox
+    password: str
+    cancel: CALLBACK_TYPE
+
+
+async def async_import_transport(hass: HomeAssistant, port: int) -> ModuleType:
+    """Import the pywattbox module for a port in the executor.
+
+    The modules pywattbox would import on first connect are loaded along
+    with it, so nothing blocks the event loop later. Each transport is only
+    imported once, and only when a WattBox uses it.
+    """
+    modules = [
+        await async_import_module(hass, module)
+        for module in TRANSPORT_MODULES[port if port in (22, 23) else None]
+    ]
+    return modules[0]
+
+
+async def _async_new_wattbox(
+    hass: HomeAssistant, host: str, port: int, username: str, password: str
+) -> BaseWattBox:
+    """Create a WattBox instance based on port (IP or HTTP), not yet connected."""
+    transport = await async_import_transport(hass, port)
+    if port in (22, 23):
+        _LOGGER.debug("Creating IP WattBox")
+        wattbox: BaseWattBox = transport.IpWattBox(
+            host=host, user=username, password=password, port=port
+        )
+    else:
+        _LOGGER.debug("Creating HTTP WattBox")
+        wattbox = transport.HttpWattBox(
+            host=host, user=username, password=password, port=port
+        )
+    return wattbox
+
+
+async def async_create_wattbox(
+    hass: HomeAssistant, host: str, port: int, username: str, password: str
+) -> BaseWattBox:
+    """Create a WattBox instance and run the initial update."""
+    wattbox = await _async_new_wattbox(hass, host, port, username, password)
+    await wattbox.async_get_initial()
+    await wattbox.async_update()
+    return wattbox
+
+
+async def async_restore_wattbox(
+    hass: HomeAssistant,
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    stored: StoredSnapshot,
+) -> BaseWattBox:
+    """Create a WattBox from its stored snapshot, without connecting.
+
+    This mirrors what the initial update sets up, so entities can be created
+    straight away. The coordinator runs the real initial update later.
+    """
+    wattbox = await _async_new_wattbox(hass, host, port, username, password)
+    for key, value in stored["info"].items():
+        setattr(wattbox, key, value)
+
+    # The index for outlet within WattBox starts at 1.
+    wattbox.outlets = {
+        i: Outlet(i, wattbox) for i in range(1, wattbox.number_outlets + 1)
+    }
+    if port in (22, 23):
+        # Same check as IpWattBox.parse_initial
+        hardware_version = wattbox.hardware_version or ""
+        cast("IpWattBox", wattbox).outlet_power_status = (
+            "150" not in hardware_version and "250" not in hardware_version
+        )
+    else:
+        # Already imported along with the transport.
+        from pywattbox.http_wattbox import MasterSwitch
+
+        wattbox.master_outlet = MasterSwitch(cast("HttpWattBox", wattbox))
+
+    apply_snapshot(wattbox, stored["data"])
+    return wattbox
+
+
+async def async_load_wattbox(
+    hass: HomeAssistant, name: str, host: str, port: int, username: str, password: str
+) -> tuple[BaseWattBox, bool]:
+    """Restore a WattBox from its snapshot if there is one, else connect.
+
+    Returns the WattBox and whether it was restored.
+    """
+    store = await async_get_snapshot_store(hass)
+    stored = store.async_get(name)
+    if stored is not None and (stored["host"], stored["port"]) == (host, port):
+        try:
+            wattbox = await async_restore_wattbox(
+                hass, host, port, username, password, stored
+            )
+        except Exception as error:
+            _LOGGER.debug("Could not restore %s from its snapshot: %s", name, error)
+        else:
+            _LOGGER.debug("Restored %s from its snapshot", name)
+            return wattbox, True
+    return await async_create_wattbox(hass, host, port, username, password), False
+
+
+@callback
+def async_store_handoff(
+    hass: HomeAssistant, wattbox: BaseWattBox, username: str, password: str
+) -> None:
+    """Keep a validated WattBox around for the entry setup to adopt.
+
+    The config flow already connected and ran a full update, so the entry
+    setup can skip straight to using it. It is closed if nothing adopts it
+    within HANDOFF_TTL.
+    """
+    handoffs: dict[tuple[str, int | None, str], _Handoff] = hass.data.setdefault(
+        DOMAIN_HANDOFF, {}
+    )
+    key = (wattbox.host, wattbox.port, username)
+    if (previous := handoffs.pop(key, None)) is not None:
+        previous["cancel"]()
+        hass.async_create_task(async_close_wattbox(hass, previous["wattbox"]))
+
+    async def _async_expire(_now: datetime) -> None:
+        """Close the WattBox if it was never adopted."""
+        if (handoff := handoffs.pop(key, None)) is not None:
+            _LOGGER.debug("Closing unused connection to %s", wattbox.host)
+            await async_close_wattbox(hass, handoff["wattbox"])
+
+    handoffs[key] = {
+        "wattbox": wattbox,
+        "password": password,
+        "cancel": async_call_later(hass, HANDOFF_TTL, _async_expire),
+    }
+
+
+@callback
+def async_pop_handoff(
+    hass: HomeAssistant, host: str, port: int, username: str, password: str
+) -> BaseWattBox | None:
+    """Take the WattBox validated by the config flow, if there is one."""
+    handoffs: dict[tuple[str, int | None, str], _Handoff] = hass.data.get(
+        DOMAIN_HANDOFF, {}
+    )
+    if (handoff := handoffs.pop((host, port, username), None)) is None:
+        return None
+    handoff["cancel"]()
+    if handoff["password"] != password:
+        hass.async_create_task(async_close_wattbox(hass, handoff["wattbox"]))
+        return None
+    _LOGGER.debug("Adopting connection to %s from the config flow", host)
+    return handoff["wattbox"]
+
+
+async def async_close_wattbox(hass: HomeAssistant, wattbox: BaseWattBox) -> None:
+    """Close the connection of a WattBox that is not used."""
+    await create_session(hass, wattbox).async_close()
@@ -15,6 +15,11 @@ from homeassistant.const import (
 # Base component constants
 DOMAIN: Final[str] = "wattbox"
 DOMAIN_DATA: Final[str] = f"{DOMAIN}_data"
+DOMAIN_MAC_RESOLVER: Final[str] = f"{DOMAIN}_mac_resolver"
+DOMAIN_SESSION_SLOTS: Final[str] = f"{DOMAIN}_session_slots"
+DOMAIN_HANDOFF: Final[str] = f"{DOMAIN}_handoff"
+DOMAIN_SNAPSHOT_STORE: Final[str] = f"{DOMAIN}_snapshot_store"
+DOMAIN_FLEET: Final[str] = f"{DOMAIN}_fleet"
 VERSION: Final[str] = "1.0.0"
 PLATFORMS: Final[list[str]] = ["binary_sensor", "button", "sensor", "switch"]
 ISSUE_URL: Final[str] = "https://github.com/eseglem/hass-wattbox/issues"
@@ -40,12 +45,112 @@ DEFAULT_PASSWORD: Final[str] = DOMAIN
 DEFAULT_PORT: Final[int] = 80
 DEFAULT_USER: Final[str] = DOMAIN
 DEFAULT_SCAN_INTERVAL: Final[timedelta] = timedelta(seconds=30)
+DEFAULT_MAX_SCAN_INTERVAL: Final[timedelta] = timedelta(minutes=5)
+DEFAULT_STAGGER: Final[bool] = True
+
+# Adaptive polling, the interval stretches so a poll takes at most
+# 1 / POLL_LATENCY_MULTIPLIER of it. Latency is an exponential moving average.
+POLL_LATENCY_MULTIPLIER: Final[float] = 4.0
+POLL_LATENCY_SMOOTHING: Final[float] = 0.3
+
+# Unreachable devices, retries back off exponentially with jitter. Once the
+# circuit breaker opens a TCP probe has to succeed before a full login.
+DEFAULT_STALE_AFTER: Final[timedelta] = timedelta(minutes=3)
+BACKOFF_MAX: Final[timedelta] = timedelta(minutes=10)
+BACKOFF_JITTER: Final[float] = 0.2
+CIRCUIT_BREAKER_THRESHOLD: Final[int] = 3
+PROBE_TIMEOUT: Final[float] = 5.0
+
+# YAML hosts are set up concurrently, failing ones retry in the background.
+SETUP_CONCURRENCY: Final[int] = 4
+SETUP_TIMEOUT: Final[float] = 60.0
+SETUP_RETRY_DELAY: Final[timedelta] = timedelta(seconds=30)
+
+# Telnet/SSH sessions, kept logged in between polls.
+KEEPALIVE_INTERVAL: Final[timedelta] = timedelta(seconds=60)
+KEEPALIVE_TIMEOUT: Final[float] = 10.0
+MAX_SESSIONS_PER_HOST: Final[int] = 2
+SESSION_SLOT_TIMEOUT: Final[float] = 30.0
+# Prefix of the status lines a WattBox sends unsolicited, "~OutletStatus=...".
+STATUS_PREFIX: Final[str] = "~"
+
+# Outlet commands arriving within this many seconds are sent as one batch.
+COMMAND_BATCH_WINDOW: Final[float] = 0.1
+# Seconds after a batch of commands before the outlet states are read back,
+# later batches within it share the read.
+OUTLET_REFRESH_DELAY: Final[float] = 1.0
+# An outlet reset is read back again once it should be back on.
+RESET_REFRESH_DELAY: Final[timedelta] = timedelta(seconds=15)
+
+# Tiered polling of IP WattBoxes, outlet states and electrical readings are
+# polled every scan interval, these tiers less often.
+TIER_MEDIUM_INTERVAL: Final[timedelta] = timedelta(minutes=2)
+TIER_SLOW_INTERVAL: Final[timedelta] = timedelta(minutes=10)
+# Requests whose status the WattBox pushes on its own are only polled this
+# often, to reconcile anything the session missed.
+PUSH_RECONCILE_INTERVAL: Final[timedelta] = timedelta(minutes=5)
+
+# Recent poll and command latencies kept per WattBox for diagnostics.
+LATENCY_SAMPLES: Final[int] = 100
+# Recent requests kept per WattBox in the I/O trace.
+TRACE_SIZE: Final[int] = 200
+# Per poll debug logs of the whole WattBox are only written every Nth poll.
+DEBUG_LOG_SAMPLE_RATE: Final[int] = 10
+
+# Rolling min, max and mean of these readings, over each window.
+STATISTICS_READINGS: Final[tuple[str, ...]] = (
+    "power_value",
+    "current_value",
+    "voltage_value",
+)
+STATISTICS_TYPES: Final[tuple[str, ...]] = ("min", "max", "mean")
+STATISTICS_WINDOWS: Final[tuple[timedelta, ...]] = (
+    timedelta(minutes=1),
+    timedelta(minutes=5),
+    timedelta(minutes=15),
+)
+# Samples kept per window, whatever the scan interval.
+STATISTICS_MAX_SAMPLES: Final[int] = 1024
+
+# Changes to readings smaller than the larger of the absolute and relative
+# (to the last published value) deadband are not published, unless the
+# published value is older than DEADBAND_HEARTBEAT, which also writes
+# readings that did not change at all again. Outlet readings and the rolling
+# statistics use the deadband of their reading.
+DEADBANDS: Final[dict[str, tuple[float, float]]] = {
+    "current_value": (0.1, 0.02),
+    "power_value": (2.0, 0.02),
+    "voltage_value": (0.5, 0.0),
+}
+DEADBAND_HEARTBEAT: Final[timedelta] = timedelta(minutes=10)
+
+# Seconds between writes of the persisted device snapshots.
+SNAPSHOT_SAVE_DELAY: Final[int] = 300
+
+# How long a connection validated by the config flow waits to be adopted.
+HANDOFF_TTL: Final[timedelta] = timedelta(minutes=2)
 
-TOPIC_UPDATE: Final[str] = "{}_data_update_{}"
+# MAC address cache lifetimes, misses are retried sooner.
+MAC_CACHE_TTL: Final[timedelta] = timedelta(days=7)
+MAC_MISS_TTL: Final[timedelta] = timedelta(minutes=10)
 
 # config options
 CONF_NAME_REGEXP: Final[str] = "name_regexp"
 CONF_SKIP_REGEXP: Final[str] = "skip_regexp"
+CONF_MAX_SCAN_INTERVAL: Final[str] = "max_scan_interval"
+CONF_STALE_AFTER: Final[str] = "stale_after"
+CONF_STAGGER: Final[str] = "stagger"
+CONF_TAG: Final[str] = "tag"
+# Discovery info key that loads the fleet sensors instead of a WattBox.
+CONF_FLEET: Final[str] = "fleet"
+
+# Attributes
+ATTR_AVAILABLE: Final[str] = "available"
+ATTR_RESTORED: Final[str] = "restored"
+ATTR_SCAN_INTERVAL: Final[str] = "scan_interval"
+
+# Resource for the per outlet readings, on IP WattBoxes that meter outlets.
+OUTLET_METERING: Final[str] = "outlet_metering"
 
 
 class _BinarySensorDict(TypedDict):
@@ -123,3 +228,12 @@ SENSOR_TYPES: Final[dict[str, _SensorTypeDict]] = {
         "icon": "mdi:lightning-bolt-circle",
     },
 }
+
+
+# Values each WattBox contributes to the fleet totals, one sensor each.
+FLEET_METRICS: Final[tuple[str, ...]] = (
+    "power_value",
+    "current_value",
+    "outlets_on",
+    "on_battery",
+)
@@ -0,0 +1,851 @@
+"""Data coordinator for wattbox."""
+
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import time
+from collections import deque
+from collections.abc import Collection, Iterable, Sequence
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Final, cast
+
+from homeassistant.const import ATTR_CONNECTIONS
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+from pywattbox.base import BaseWattBox, Commands, Outlet
+
+from .commands import CommandFailed, WattBoxCommandQueue
+from .const import (
+    ATTR_AVAILABLE,
+    ATTR_RESTORED,
+    ATTR_SCAN_INTERVAL,
+    BACKOFF_JITTER,
+    BACKOFF_MAX,
+    BINARY_SENSOR_TYPES,
+    CIRCUIT_BREAKER_THRESHOLD,
+    DEADBAND_HEARTBEAT,
+    DEADBANDS,
+    DEBUG_LOG_SAMPLE_RATE,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STALE_AFTER,
+    DOMAIN,
+    LATENCY_SAMPLES,
+    OUTLET_METERING,
+    OUTLET_REFRESH_DELAY,
+    POLL_LATENCY_MULTIPLIER,
+    POLL_LATENCY_SMOOTHING,
+    PROBE_TIMEOUT,
+    RESET_REFRESH_DELAY,
+    SENSOR_TYPES,
+    STATISTICS_MAX_SAMPLES,
+    STATISTICS_READINGS,
+    STATISTICS_TYPES,
+    STATISTICS_WINDOWS,
+)
+from .energy import WattBoxEnergyMeter
+from .fleet import async_get_fleet
+from .mac import async_get_mac_resolver
+from .polling import TieredPoller
+from .session import IpWattBoxSession, create_session
+from .statistics import RollingWindow
+from .store import (
+    INFO_KEYS,
+    StoredSnapshot,
+    WattBoxSnapshotStore,
+    async_get_snapshot_store,
+)
+
+if TYPE_CHECKING:
+    from pywattbox.ip_wattbox import IpWattBox
+
+_LOGGER = logging.getLogger(__name__)
+
+ALL_RESOURCES: Final[tuple[str, ...]] = (
+    *BINARY_SENSOR_TYPES,
+    *SENSOR_TYPES,
+    OUTLET_METERING,
+)
+
+# Device level values that make up a snapshot, outlets are added separately.
+SNAPSHOT_KEYS: Final[tuple[str, ...]] = (
+    *BINARY_SENSOR_TYPES.keys(),
+    *SENSOR_TYPES.keys(),
+    "firmware_version",
+    "hardware_version",
+)
+OUTLET_FIELDS: Final[tuple[str, ...]] = (
+    "name",
+    "method",
+    "status",
+    "power_value",
+    "current_value",
+    "voltage_value",
+)
+# Snapshot keys that are part of the device info.
+DEVICE_INFO_KEYS: Final[frozenset[str]] = frozenset(
+    ("firmware_version", "hardware_version")
+)
+
+
+def outlet_key(index: int, field: str) -> str:
+    """Snapshot key for a single outlet field. Index 0 is the master outlet."""
+    return f"outlet_{index}_{field}"
+
+
+def statistics_key(reading: str, statistic: str, window: timedelta) -> str:
+    """Snapshot key for a rolling statistic, such as power_value_mean_5m."""
+    return f"{reading}_{statistic}_{round(window.total_seconds() / 60)}m"
+
+
+def deadband(key: str) -> tuple[float, float] | None:
+    """Absolute and relative deadband of a snapshot key, None if it has none."""
+    for reading, band in DEADBANDS.items():
+        # The reading itself, an outlet reading or a rolling statistic.
+        if key == reading or key.endswith(f"_{reading}") or key.startswith(reading):
+            return band
+    return None
+
+
+def poll_phase(key: str) -> float:
+    """Stable fraction of the scan interval to poll at, from a hash of the key.
+
+    Unlike hash() this does not change between restarts.
+    """
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8]) / 2**64
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float | None:
+    """Nearest rank percentile of the samples, None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def to_milliseconds(seconds: float | None) -> int | None:
+    """Whole milliseconds, so sensors do not change on noise."""
+    return None if seconds is None else round(seconds * 1000)
+
+
+def to_watt_hours(total: float | None) -> float | None:
+    """kWh rounded to the Wh, so sensors do not change on noise."""
+    return None if total is None else round(total, 3)
+
+
+def build_snapshot(wattbox: BaseWattBox) -> dict[str, Any]:
+    """Flatten the current values of a WattBox into a single dict."""
+    snapshot: dict[str, Any] = {
+        key: getattr(wattbox, key) for key in SNAPSHOT_KEYS if hasattr(wattbox, key)
+    }
+    for index, outlet in wattbox.outlets.items():
+        for field in OUTLET_FIELDS:
+            snapshot[outlet_key(index, field)] = getattr(outlet, field)
+    if wattbox.master_outlet is not None:
+        snapshot[outlet_key(0, "status")] = wattbox.master_outlet.status
+    return snapshot
+
+
+def apply_snapshot(wattbox: BaseWattBox, snapshot: dict[str, Any]) -> None:
+    """Set the values of a snapshot back onto a WattBox."""
+    for key in SNAPSHOT_KEYS:
+        if key in snapshot:
+            setattr(wattbox, key, snapshot[key])
+    for index, outlet in wattbox.outlets.items():
+        for field in OUTLET_FIELDS:
+            if (key := outlet_key(index, field)) in snapshot:
+                setattr(outlet, field, snapshot[key])
+    if wattbox.master_outlet is not None:
+        wattbox.master_outlet.status = snapshot.get(outlet_key(0, "status"))
+
+
+class WattBoxCoordinator:
+    """Poll a single WattBox and push changed values to its entities.
+
+    Entities register for the snapshot keys they render. After every poll the
+    new snapshot is diffed against the previous one and only the listeners of
+    keys that changed are called.
+
+    The next poll is only scheduled once the previous one has finished, so
+    polls never overlap and missed ticks are coalesced. The effective
+    interval stretches with the average poll latency, between the scan
+    interval and the max scan interval.
+
+    With stagger enabled each WattBox polls at a fixed phase of the wall
+    clock, derived from its serial number, so a fleet of them spreads its
+    polls across the interval instead of all polling at once.
+
+    Failed polls back off exponentially. After a few in a row the circuit
+    breaker opens and a cheap TCP probe has to succeed before another full
+    login is attempted. Entities go unavailable once the last good snapshot
+    is older than stale_after.
+
+    A restored coordinator starts from the snapshot persisted on the last
+    run, so entities exist before the WattBox is reachable. Its first poll
+    runs the full initial update, and the entities carry the restored
+    attribute until it succeeds.
+
+    Status lines an IP WattBox pushes between polls are applied right away,
+    without waiting for the next poll.
+
+    The power readings of every poll are integrated into the total energy,
+    with the total persisted alongside the snapshot.
+
+    After every snapshot the WattBox reports its totals to the fleet, where
+    they are summed with those of the other WattBoxes.
+
+    Outlet commands are confirmed by reading the outlet states back shortly
+    after they were sent, which also rolls back optimistic states the
+    WattBox does not agree with.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        wattbox: BaseWattBox,
+        restored: bool = False,
+    ) -> None:
+        self.hass = hass
+        self.name = name
+        self.wattbox = wattbox
+        self.restored = restored
+        # Called when the first real poll of a restored WattBox finds a
+        # different device or outlet table than the stored one.
+        self.on_identity_changed: CALLBACK_TYPE | None = None
+        self.session = create_session(hass, wattbox)
+        self.commands = WattBoxCommandQueue(hass, wattbox, self.session)
+        self.commands.on_latency = self._async_record_command_latency
+        self.commands.on_sent = self._async_handle_commands_sent
+        self.scan_interval: timedelta = DEFAULT_SCAN_INTERVAL
+        self.max_scan_interval: timedelta = DEFAULT_MAX_SCAN_INTERVAL
+        self.effective_interval: timedelta = DEFAULT_SCAN_INTERVAL
+        self.poll_latency: float | None = None
+        self.stagger = False
+        self.phase = poll_phase(wattbox.serial_number or wattbox.host)
+        self.stale_after: timedelta = DEFAULT_STALE_AFTER
+        self.available = True
+        self.consecutive_failures = 0
+        self.last_error: str | None = None
+        self.last_success: datetime | None = None
+        # Seconds, most recent last.
+        self.poll_latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.command_latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.energy = WattBoxEnergyMeter()
+        # Per outlet energy, on WattBoxes that meter their outlets.
+        self.outlet_energy: dict[int, WattBoxEnergyMeter] = (
+            {index: WattBoxEnergyMeter() for index in wattbox.outlets}
+            if getattr(wattbox, "outlet_power_status", False)
+            else {}
+        )
+        # Set by async_start, only if the power readings are polled.
+        self.track_energy = False
+        # Rolling windows per reading, created by async_start for the
+        # readings that are polled.
+        self.statistics: dict[str, list[tuple[timedelta, RollingWindow]]] = {}
+        self.data: dict[str, Any] = self._build_data()
+        self.mac_address: str | None = None
+        self.device_info: DeviceInfo = self._build_device_info()
+        self._listeners: dict[str, list[CALLBACK_TYPE]] = {}
+        self._fleet = async_get_fleet(hass)
+        # Groups the WattBox in the fleet totals, set by async_start.
+        self.tag: str | None = None
+        self._deadbands: dict[str, tuple[float, float] | None] = {}
+        # Monotonic time each deadbanded key was last published.
+        self._published: dict[str, float] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._unsub_refresh: CALLBACK_TYPE | None = None
+        self._unsub_stale: CALLBACK_TYPE | None = None
+        self._unsub_reset_refresh: CALLBACK_TYPE | None = None
+        self._outlet_refresh = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=OUTLET_REFRESH_DELAY,
+            immediate=False,
+            function=self._async_refresh_outlets,
+        )
+        self._shutdown = False
+        self._polls = 0
+        self._poller: TieredPoller | None = None
+        self._snapshot_store: WattBoxSnapshotStore | None = None
+
+    async def async_setup(self) -> None:
+        """Prepare the coordinator before the platforms are loaded."""
+        await self.session.async_setup()
+        self._snapshot_store = await async_get_snapshot_store(self.hass)
+        if (stored := self._snapshot_store.async_get(self.name)) is not None:
+            if (energy := stored.get("energy")) is not None:
+                self.energy.restore(energy)
+            for index, total in stored.get("outlet_energy", {}).items():
+                if (meter := self.outlet_energy.get(int(index))) is not None:
+                    meter.restore(total)
+            self.data = self._build_data()
+        if self.wattbox.host:
+            resolver = await async_get_mac_resolver(self.hass)
+            self.mac_address = await resolver.async_get(self.wattbox.host)
+        self.device_info = self._build_device_info()
+
+    def _build_device_info(self) -> DeviceInfo:
+        """Build the device info shared by all entities of this WattBox."""
+        wattbox = self.wattbox
+        device_info = DeviceInfo(
+            identifiers={(DOMAIN, wattbox.serial_number)},
+            name=self.name,
+            manufacturer="WattBox",
+            model=wattbox.hardware_version or "WattBox",
+            sw_version=wattbox.firmware_version,
+            serial_number=wattbox.serial_number,
+            configuration_url=f"http://{wattbox.host}:{wattbox.port}",
+        )
+
+        # Add MAC address connection if it was resolved
+        if self.mac_address:
+            device_info[ATTR_CONNECTIONS] = {
+                (dr.CONNECTION_NETWORK_MAC, self.mac_address)
+            }
+
+        return device_info
+
+    @callback
+    def _async_refresh_device_info(self) -> None:
+        """Rebuild the device info and push it to the device registry."""
+        self.device_info = self._build_device_info()
+        device_registry = dr.async_get(self.hass)
+        if device := device_registry.async_get_device(
+            identifiers={(DOMAIN, self.wattbox.serial_number)}
+        ):
+            device_registry.async_update_device(
+                device.id,
+                model=self.device_info.get("model"),
+                sw_version=self.device_info.get("sw_version"),
+            )
+
+    def _build_data(self) -> dict[str, Any]:
+        """Build the snapshot of the WattBox plus the coordinator values."""
+        data = build_snapshot(self.wattbox)
+        data[ATTR_AVAILABLE] = self.available
+        data[ATTR_RESTORED] = self.restored
+        # Whole seconds, so small latency changes do not cause state writes.
+        data[ATTR_SCAN_INTERVAL] = round(self.effective_interval.total_seconds())
+        data["poll_latency"] = to_milliseconds(
+            self.poll_latencies[-1] if self.poll_latencies else None
+        )
+        data["poll_latency_p95"] = to_milliseconds(
+            percentile(self.poll_latencies, 0.95)
+        )
+        data["command_latency"] = to_milliseconds(
+            self.command_latencies[-1] if self.command_latencies else None
+        )
+        data["consecutive_failures"] = self.consecutive_failures
+        data["last_success"] = self.last_success
+        data["total_energy"] = to_watt_hours(self.energy.total)
+        for index, meter in self.outlet_energy.items():
+            data[outlet_key(index, "energy")] = to_watt_hours(meter.total)
+        for reading, windows in self.statistics.items():
+            for window, rolling in windows:
+                for statistic in STATISTICS_TYPES:
+                    value = getattr(rolling, statistic)
+                    data[statistics_key(reading, statistic, window)] = (
+                        None if value is None else round(value, 2)
+                    )
+        return data
+
+    @callback
+    def async_add_listener(
+        self, keys: Iterable[str], update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for changes to any of the given snapshot keys."""
+        keys = tuple(keys)
+        for key in keys:
+            self._listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the listener."""
+            for key in keys:
+                listeners = self._listeners[key]
+                listeners.remove(update_callback)
+                if not listeners:
+                    del self._listeners[key]
+
+        return remove_listener
+
+    @callback
+    def _async_notify(self, changed: Iterable[str]) -> None:
+        """Call each listener of the changed keys once."""
+        # dict keeps registration order and drops duplicates.
+        callbacks: dict[CALLBACK_TYPE, None] = {}
+        for key in changed:
+            for update_callback in self._listeners.get(key, ()):
+                callbacks[update_callback] = None
+        for update_callback in callbacks:
+            update_callback()
+
+    @callback
+    def async_set_updated_data(self) -> None:
+        """Take a new snapshot of the WattBox and notify on changed keys."""
+        previous = self.data
+        self.data = self._build_data()
+        heartbeats = self._apply_deadbands(previous)
+        changed = [
+            key
+            for key, value in self.data.items()
+            if key not in previous or previous[key] != value
+        ]
+        if changed:
+            _LOGGER.debug("%s changed: %s", self.name, changed)
+            if DEVICE_INFO_KEYS.intersection(changed):
+                self._async_refresh_device_info()
+            self._async_notify(changed)
+            self._async_report_to_fleet()
+        if heartbeats:
+            # Written again unchanged, so they do not look stale.
+            self._async_notify(heartbeats)
+
+    @callback
+    def _async_report_to_fleet(self) -> None:
+        """Report the published values to the fleet totals."""
+        data = self.data
+        if not self.available:
+            # Nothing is known about a WattBox that stopped answering.
+            self._fleet.async_report(self.name, self.tag, {})
+            return
+        self._fleet.async_report(
+            self.name,
+            self.tag,
+            {
+                "power_value": data.get("power_value") or 0.0,
+                "current_value": data.get("current_value") or 0.0,
+                "outlets_on": sum(
+                    1
+                    for index in self.wattbox.outlets
+                    if data.get(outlet_key(index, "status"))
+                ),
+                "on_battery": 1.0 if data.get("power_lost") else 0.0,
+            },
+        )
+
+    def _apply_deadbands(self, previous: dict[str, Any]) -> list[str]:
+        """Keep the published value of readings that barely changed.
+
+        Returns the readings due their heartbeat that did not change at all,
+        they are published again anyway.
+        """
+        now = time.monotonic()
+        heartbeat = DEADBAND_HEARTBEAT.total_seconds()
+        deadbands = self._deadbands
+        published = self._published
+        data = self.data
+        due = []
+        for key, value in data.items():
+            if key in deadbands:
+                band = deadbands[key]
+            else:
+                band = deadbands[key] = deadband(key)
+            if band is None:
+                continue
+            if key not in published or key not in previous:
+                # Published as is the first time it shows up.
+                published[key] = now
+                continue
+            old = previous[key]
+            if now - published[key] >= heartbeat:
+                published[key] = now
+                if value == old:
+                    due.append(key)
+            elif value == old:
+                continue
+            elif (
+                value is not None
+                and old is not None
+                and abs(value - old) < max(band[0], band[1] * abs(old))
+            ):
+                data[key] = old
+            else:
+                published[key] = now
+        return due
+
+    @callback
+    def async_restore_energy(self, total: float) -> None:
+        """Continue the total energy from a persisted value."""
+        self.energy.restore(total)
+        self.async_set_value("total_energy", to_watt_hours(self.energy.total))
+
+    def _record_statistics(self) -> None:
+        """Add the current readings to their rolling windows."""
+        now = time.monotonic()
+        for reading, windows in self.statistics.items():
+            if (value := getattr(self.wattbox, reading, None)) is None:
+                continue
+            for _window, rolling in windows:
+                rolling.add(now, value)
+
+    def _integrate_energy(self) -> None:
+        """Add the power readings of the poll that just finished to the totals."""
+        now = time.monotonic()
+        max_gap = self.stale_after.total_seconds()
+        if self.track_energy:
+            self.energy.add(self.wattbox.power_value, now, max_gap)
+        outlets = self.wattbox.outlets
+        for index, meter in self.outlet_energy.items():
+            if (outlet := outlets.get(index)) is not None:
+                meter.add(outlet.power_value, now, max_gap)
+
+    @callback
+    def async_set_value(self, key: str, value: Any) -> None:
+        """Set a single value, such as an optimistic outlet state.
+
+        The next poll diffs against this value, so it is corrected if the
+        device does not agree.
+        """
+        if self.data.get(key) != value:
+            self.data[key] = value
+            self._async_notify((key,))
+
+    async def async_send_command(self, outlet: Outlet, command: Commands) -> None:
+        """Send an outlet command, showing its state until it is confirmed.
+
+        The outlet states are read back after the command, which corrects
+        the optimistic state if it did not take. A reset shows the outlet as
+        off until it is back on.
+        """
+        key = outlet_key(outlet.index, "status")
+        previous = self.data.get(key)
+        self.async_set_value(key, command == Commands.ON)
+        try:
+            await self.commands.async_send(outlet, command)
+        except CommandFailed:
+            self.async_set_value(key, previous)
+            raise
+
+    async def async_refresh(self) -> None:
+        """Poll the WattBox and push any changes.
+
+        If a poll is already running, wait for it instead of starting another.
+        """
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return
+        async with self._refresh_lock:
+            await self._async_poll()
+
+    @callback
+    def _async_handle_commands_sent(self, commands: list[Commands]) -> None:
+        """Read the outlet states back after a batch of commands."""
+        self._outlet_refresh.async_schedule_call()
+        if Commands.RESET in commands:
+            if self._unsub_reset_refresh is not None:
+                self._unsub_reset_refresh()
+            self._unsub_reset_refresh = async_call_later(
+                self.hass, RESET_REFRESH_DELAY, self._async_handle_reset_refresh
+            )
+
+    @callback
+    def _async_handle_reset_refresh(self, _now: datetime) -> None:
+        """Read the outlet states back once a reset should have finished."""
+        self._unsub_reset_refresh = None
+        self._outlet_refresh.async_schedule_call()
+
+    async def _async_refresh_outlets(self) -> None:
+        """Read only the outlet states and push any changes."""
+        if self._shutdown:
+            return
+        if self._poller is None:
+            # HTTP has a single status page, reading it is a full poll.
+            await self.async_refresh()
+            return
+        try:
+            await self.session.async_run(self._poller.async_update_outlets, retry=True)
+        except Exception as err:
+            # The next poll tries again, and counts it if it fails too.
+            _LOGGER.debug("Could not read the outlets of %s: %s", self.name, err)
+            return
+        self.async_set_updated_data()
+        self._async_store_snapshot()
+
+    @property
+    def circuit_open(self) -> bool:
+        """Whether enough polls failed in a row to stop attempting logins."""
+        return self.consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD
+
+    async def _async_poll(self) -> None:
+        """Poll the WattBox, track the latency and push any changes."""
+        start = time.monotonic()
+        try:
+            if self.restored:
+                await self.session.async_run(self._async_initial_update, retry=True)
+            elif self._poller is not None:
+                await self.session.async_run(self._poller.async_update, retry=True)
+            else:
+                await self.session.async_run(self.wattbox.async_update, retry=True)
+        except Exception as error:
+            self._async_record_failure(error)
+            return
+        self._async_record_latency(time.monotonic() - start)
+        # Once per poll, pushed readings and outlet refreshes in between
+        # would weigh the statistics towards themselves. They carry no new
+        # power reading either, so energy is only integrated here too.
+        self._record_statistics()
+        self._integrate_energy()
+        # The full repr is large, only log it for every Nth poll.
+        if self._polls % DEBUG_LOG_SAMPLE_RATE == 0:
+            _LOGGER.debug("Updated: %s - %r", self.wattbox, self.wattbox)
+        self._polls += 1
+        if self.consecutive_failures:
+            _LOGGER.info(
+                "Reconnected to %s after %s failed updates",
+                self.name,
+                self.consecutive_failures,
+            )
+            self.consecutive_failures = 0
+        self.last_success = dt_util.utcnow()
+        self.available = True
+        self._async_arm_stale_timer()
+        self.async_set_updated_data()
+        self._async_store_snapshot()
+
+    async def _async_initial_update(self) -> None:
+        """Run the initial update on a WattBox restored from storage."""
+        identity = (self.wattbox.serial_number, self.wattbox.number_outlets)
+        await self.wattbox.async_get_initial()
+        await self.wattbox.async_update()
+        self.restored = False
+        if (self.wattbox.serial_number, self.wattbox.number_outlets) != identity:
+            _LOGGER.warning(
+                "%s does not match the stored snapshot, reloading", self.name
+            )
+            if self.on_identity_changed is not None:
+                self.on_identity_changed()
+
+    @callback
+    def _async_handle_status(self, name: str, value: str) -> None:
+        """Apply a status the WattBox pushed between polls."""
+        if self._poller is None:
+            return
+        try:
+            handled = self._poller.handle_status(name, value)
+        except (IndexError, ValueError) as err:
+            _LOGGER.debug(
+                "Could not parse %s=%s from %s: %s", name, value, self.name, err
+            )
+            return
+        if handled:
+            self.async_set_updated_data()
+            self._async_store_snapshot()
+
+    @callback
+    def _async_store_snapshot(self) -> None:
+        """Persist the snapshot so the next start can restore from it."""
+        if self._snapshot_store is None:
+            return
+        snapshot: StoredSnapshot = {
+            "host": self.wattbox.host,
+            "port": self.wattbox.port,
+            "info": {key: getattr(self.wattbox, key) for key in INFO_KEYS},
+            "data": build_snapshot(self.wattbox),
+        }
+        if self.energy.total is not None:
+            snapshot["energy"] = self.energy.total
+        if self.outlet_energy:
+            snapshot["outlet_energy"] = {
+                str(index): meter.total
+                for index, meter in self.outlet_energy.items()
+                if meter.total is not None
+            }
+        self._snapshot_store.async_set(self.name, snapshot)
+
+    @callback
+    def _async_record_failure(self, error: Exception | None) -> None:
+        """Count a failed poll, only logging the transitions loudly."""
+        self.consecutive_failures += 1
+        self.last_error = "TCP probe failed" if error is None else repr(error)
+        self.async_set_value("consecutive_failures", self.consecutive_failures)
+        if self.consecutive_failures == 1:
+            _LOGGER.error("Could not update data for %s - %s", self.name, error)
+        elif self.consecutive_failures == CIRCUIT_BREAKER_THRESHOLD:
+            _LOGGER.warning(
+                "%s failed %s updates in a row, backing off - %s",
+                self.name,
+                self.consecutive_failures,
+                error,
+            )
+        else:
+            _LOGGER.debug("Could not update data for %s - %s", self.name, error)
+
+    async def _async_probe(self) -> bool:
+        """Check the WattBox accepts TCP connections, without logging in."""
+        try:
+            async with asyncio.timeout(PROBE_TIMEOUT):
+                _reader, writer = await asyncio.open_connection(
+                    self.wattbox.host, self.wattbox.port
+                )
+        except (OSError, TimeoutError):
+            return False
+        writer.close()
+        return True
+
+    @callback
+    def _async_arm_stale_timer(self) -> None:
+        """(Re)start the timer that marks the snapshot as stale."""
+        if self._unsub_stale is not None:
+            self._unsub_stale()
+        self._unsub_stale = async_call_later(
+            self.hass, self.stale_after, self._async_mark_stale
+        )
+
+    @callback
+    def _async_mark_stale(self, _now: datetime) -> None:
+        """Mark the entities unavailable, no poll succeeded for too long."""
+        self._unsub_stale = None
+        _LOGGER.debug("Data for %s is older than %s", self.name, self.stale_after)
+        self.available = False
+        self.async_set_value(ATTR_AVAILABLE, False)
+        self._async_report_to_fleet()
+
+    def _backoff_delay(self) -> float:
+        """Seconds to wait before retrying an unreachable WattBox."""
+        delay = min(
+            self.effective_interval.total_seconds()
+            * 2 ** (self.consecutive_failures - 1),
+            BACKOFF_MAX.total_seconds(),
+        )
+        # Jitter keeps a rack of WattBoxes from retrying in lockstep.
+        return delay * random.uniform(1 - BACKOFF_JITTER, 1 + BACKOFF_JITTER)
+
+    @callback
+    def _async_record_latency(self, latency: float) -> None:
+        """Update the average poll latency and the effective interval."""
+        self.poll_latencies.append(latency)
+        if self.poll_latency is None:
+            self.poll_latency = latency
+        else:
+            self.poll_latency += POLL_LATENCY_SMOOTHING * (latency - self.poll_latency)
+        self.effective_interval = min(
+            max(
+                timedelta(seconds=self.poll_latency * POLL_LATENCY_MULTIPLIER),
+                self.scan_interval,
+            ),
+            self.max_scan_interval,
+        )
+
+    @callback
+    def _async_record_command_latency(self, latency: float) -> None:
+        """Keep the round trip time of a batch of outlet commands."""
+        self.command_latencies.append(latency)
+        self.async_set_value("command_latency", to_milliseconds(latency))
+
+    @callback
+    def _async_schedule_refresh(self, delay: float) -> None:
+        """Schedule the next poll."""
+        if not self._shutdown:
+            self._unsub_refresh = async_call_later(
+                self.hass, delay, self._async_handle_refresh_interval
+            )
+
+    async def _async_handle_refresh_interval(self, _now: datetime) -> None:
+        """Run a scheduled poll and schedule the next one."""
+        self._unsub_refresh = None
+        start = time.monotonic()
+        if self.circuit_open and not await self._async_probe():
+            self._async_record_failure(None)
+        else:
+            await self.async_refresh()
+        if self.consecutive_failures:
+            self._async_schedule_refresh(self._backoff_delay())
+            return
+        self._async_schedule_refresh(self._next_poll_delay(time.monotonic() - start))
+
+    def _next_poll_delay(self, elapsed: float) -> float:
+        """Seconds until the next poll is due."""
+        interval = self.effective_interval.total_seconds()
+        if self.stagger:
+            # Wall clock, so the phase holds across restarts and devices.
+            return (self.phase * interval - time.time()) % interval
+        return max(interval - elapsed, 0)
+
+    @callback
+    def async_start(
+        self,
+        scan_interval: timedelta,
+        max_scan_interval: timedelta | None = None,
+        stale_after: timedelta | None = None,
+        stagger: bool = True,
+        resources: Collection[str] | None = None,
+        tag: str | None = None,
+    ) -> None:
+        """Start polling at the scan interval.
+
+        IP WattBoxes only poll what the enabled resources need, in tiers.
+        HTTP has a single status page, so it is always fetched whole. Energy
+        is only tracked when the power readings are one of the resources.
+        """
+        self.scan_interval = self.effective_interval = scan_interval
+        self.track_energy = resources is None or "power_value" in resources
+        if resources is not None and OUTLET_METERING not in resources:
+            self.outlet_energy = {}
+        self.statistics = {
+            reading: [
+                (
+                    window,
+                    RollingWindow(
+                        window.total_seconds(),
+                        # Room for twice the polls, refreshes after outlet
+                        # commands poll in between on HTTP.
+                        min(
+                            math.ceil(window / scan_interval) * 2 + 1,
+                            STATISTICS_MAX_SAMPLES,
+                        ),
+                    ),
+                )
+                for window in STATISTICS_WINDOWS
+            ]
+            for reading in STATISTICS_READINGS
+            if resources is None or reading in resources
+        }
+        if self.wattbox.port in (22, 23):
+            self._poller = TieredPoller(
+                cast("IpWattBox", self.wattbox),
+                ALL_RESOURCES if resources is None else resources,
+                scan_interval,
+            )
+            if isinstance(self.session, IpWattBoxSession):
+                self.session.on_status = self._async_handle_status
+        self.max_scan_interval = max(
+            max_scan_interval or DEFAULT_MAX_SCAN_INTERVAL, scan_interval
+        )
+        self.stale_after = stale_after or DEFAULT_STALE_AFTER
+        self.stagger = stagger
+        self.tag = tag
+        self._async_report_to_fleet()
+        self._async_arm_stale_timer()
+        if self.restored:
+            # Connect right away, the entities are only showing stored data.
+            self._async_schedule_refresh(0)
+        elif stagger:
+            self._async_schedule_refresh(self._next_poll_delay(0))
+        else:
+            self._async_schedule_refresh(scan_interval.total_seconds())
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and close the session."""
+        self._shutdown = True
+        self._fleet.async_remove(self.name)
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+        if self._unsub_stale is not None:
+            self._unsub_stale()
+            self._unsub_stale = None
+        if self._unsub_reset_refresh is not None:
+            self._unsub_reset_refresh()
+            self._unsub_reset_refresh = None
+        self._outlet_refresh.async_shutdown()
+        self.commands.async_shutdown()
+        await self.session.async_close()
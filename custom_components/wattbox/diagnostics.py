@@ -0,0 +1,105 @@
+"""Diagnostics support for wattbox."""
+
+import time
+from collections.abc import Iterable
+from typing import Any, Final
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN_DATA
+from .coordinator import WattBoxCoordinator, percentile, to_milliseconds
+from .store import INFO_KEYS
+
+TO_REDACT: Final[set[str]] = {
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    "configuration_url",
+    "connections",
+    "host",
+    "identifiers",
+    "mac_address",
+    "serial_number",
+}
+
+# Upper bounds of the latency histogram buckets, in milliseconds.
+HISTOGRAM_BUCKETS: Final[tuple[int, ...]] = (50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _histogram(latencies: Iterable[float]) -> dict[str, int]:
+    """Count the latencies per bucket."""
+    labels = [f"<={bucket}ms" for bucket in HISTOGRAM_BUCKETS]
+    labels.append(f">{HISTOGRAM_BUCKETS[-1]}ms")
+    counts = dict.fromkeys(labels, 0)
+    for latency in latencies:
+        milliseconds = latency * 1000
+        index = next(
+            (i for i, bucket in enumerate(HISTOGRAM_BUCKETS) if milliseconds <= bucket),
+            len(HISTOGRAM_BUCKETS),
+        )
+        counts[labels[index]] += 1
+    return counts
+
+
+def _timings(latencies: list[float]) -> dict[str, Any]:
+    """Summarize recent latencies, in milliseconds."""
+    summary: dict[str, Any] = {
+        "samples": len(latencies),
+        "last": to_milliseconds(latencies[-1] if latencies else None),
+    }
+    for fraction in (0.5, 0.95, 0.99):
+        summary[f"p{round(fraction * 100)}"] = to_milliseconds(
+            percentile(latencies, fraction)
+        )
+    summary["histogram"] = _histogram(latencies)
+    return summary
+
+
+def _coordinator_diagnostics(coordinator: WattBoxCoordinator) -> dict[str, Any]:
+    """Connection state, timings and the snapshot of a WattBox."""
+    session = coordinator.session
+    return {
+        "info": {key: getattr(coordinator.wattbox, key) for key in INFO_KEYS},
+        "device_info": dict(coordinator.device_info),
+        "connection": {
+            "port": coordinator.wattbox.port,
+            "session": type(session).__name__,
+            "idle_seconds": round(time.monotonic() - session.last_activity, 1),
+            "healthy": session.healthy,
+            "available": coordinator.available,
+            "restored": coordinator.restored,
+            "consecutive_failures": coordinator.consecutive_failures,
+            "circuit_open": coordinator.circuit_open,
+            "last_error": coordinator.last_error,
+            "last_success": coordinator.last_success,
+            "scan_interval": coordinator.scan_interval.total_seconds(),
+            "effective_interval": coordinator.effective_interval.total_seconds(),
+            "stagger": coordinator.stagger,
+        },
+        "poll_timings": _timings(list(coordinator.poll_latencies)),
+        "command_timings": _timings(list(coordinator.command_latencies)),
+        "energy": {
+            "tracked": coordinator.track_energy,
+            "total_kwh": coordinator.energy.total,
+            "restored": coordinator.energy.restored,
+            "gaps": coordinator.energy.gaps,
+            "outlet_total_kwh": {
+                index: meter.total for index, meter in coordinator.outlet_energy.items()
+            },
+        },
+        "trace": session.trace.as_list(),
+        "data": coordinator.data,
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: WattBoxCoordinator = hass.data[DOMAIN_DATA][entry.data[CONF_NAME]]
+    return async_redact_data(
+        {"entry": entry.data, **_coordinator_diagnostics(coordinator)}, TO_REDACT
+    )
@@ -0,0 +1,46 @@
+"""Energy accounting for wattbox."""
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WattBoxEnergyMeter:
+    """Integrate the power readings of a WattBox into energy.
+
+    Each reading is integrated with the trapezoidal rule against the one
+    before it, using monotonic timestamps so clock changes do not add or
+    lose energy. Across a gap longer than max_gap nothing is known about the
+    power draw, so the gap is skipped rather than guessed at and counted in
+    gaps.
+    """
+
+    def __init__(self) -> None:
+        # kWh, None until it is restored or the first reading arrives.
+        self.total: float | None = None
+        self.gaps = 0
+        # Whether a persisted total has been added.
+        self.restored = False
+        # Monotonic time and watts of the last reading.
+        self._last: tuple[float, float] | None = None
+
+    def add(self, power: float | None, now: float, max_gap: float) -> None:
+        """Add a power reading in watts, taken at monotonic time now."""
+        if power is None:
+            return
+        if self.total is None:
+            self.total = 0.0
+        if self._last is not None:
+            last_time, last_power = self._last
+            elapsed = now - last_time
+            if elapsed > max_gap:
+                self.gaps += 1
+                _LOGGER.debug("Skipping %.0f seconds without power readings", elapsed)
+            elif elapsed > 0:
+                self.total += (last_power + power) / 2 * elapsed / 3_600_000
+        self._last = (now, power)
+
+    def restore(self, total: float) -> None:
+        """Add a persisted total to anything counted since the start."""
+        self.total = (self.total or 0.0) + total
+        self.restored = True
@@ -0,0 +1,110 @@
+"""Fleet totals across all WattBoxes."""
+
+import logging
+from collections.abc import Callable, Mapping
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DOMAIN_FLEET, FLEET_METRICS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WattBoxFleet:
+    """Totals of every WattBox, and of the WattBoxes sharing a tag.
+
+    The group None holds every WattBox. Each WattBox reports its values
+    after every snapshot, and only the difference to what it reported last
+    is applied to the totals of its groups. So an update costs the same
+    however many WattBoxes there are.
+    """
+
+    def __init__(self) -> None:
+        self.totals: dict[str | None, dict[str, float]] = {}
+        self.members: dict[str | None, int] = {}
+        # The tag and last reported values of each WattBox, by name.
+        self._reported: dict[str, tuple[str | None, dict[str, float]]] = {}
+        self._listeners: dict[str | None, list[CALLBACK_TYPE]] = {}
+        # Set by the sensor platform, called when a group gets its first
+        # member so its entities can be added.
+        self.on_group_added: Callable[[str | None], None] | None = None
+
+    @callback
+    def async_report(
+        self, name: str, tag: str | None, values: Mapping[str, float]
+    ) -> None:
+        """Apply the change in the values of a WattBox to its groups."""
+        reported = self._reported.get(name)
+        if reported is not None and reported[0] != tag:
+            self.async_remove(name)
+            reported = None
+        previous = {} if reported is None else reported[1]
+        self._reported[name] = (tag, dict(values))
+
+        deltas = {
+            metric: delta
+            for metric in FLEET_METRICS
+            if (delta := values.get(metric, 0.0) - previous.get(metric, 0.0))
+        }
+        for group in (None, tag) if tag else (None,):
+            if reported is None:
+                self._async_join(group)
+            elif not deltas:
+                continue
+            totals = self.totals[group]
+            for metric, delta in deltas.items():
+                totals[metric] += delta
+            self._async_notify(group)
+
+    @callback
+    def async_remove(self, name: str) -> None:
+        """Take a WattBox out of the totals, as it was unloaded."""
+        if (reported := self._reported.pop(name, None)) is None:
+            return
+        tag, values = reported
+        for group in (None, tag) if tag else (None,):
+            totals = self.totals[group]
+            for metric in FLEET_METRICS:
+                totals[metric] -= values.get(metric, 0.0)
+            self.members[group] -= 1
+            self._async_notify(group)
+
+    @callback
+    def _async_join(self, group: str | None) -> None:
+        """Count a new member of a group, creating the group if needed."""
+        if group in self.totals:
+            self.members[group] += 1
+            return
+        self.totals[group] = dict.fromkeys(FLEET_METRICS, 0.0)
+        self.members[group] = 1
+        _LOGGER.debug("Adding fleet group %s", group)
+        if self.on_group_added is not None:
+            self.on_group_added(group)
+
+    @callback
+    def async_add_listener(
+        self, group: str | None, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for changes to the totals of a group."""
+        self._listeners.setdefault(group, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._listeners[group].remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_notify(self, group: str | None) -> None:
+        for update_callback in self._listeners.get(group, ()):
+            update_callback()
+
+
+@callback
+def async_get_fleet(hass: HomeAssistant) -> WattBoxFleet:
+    """Get the shared fleet totals, creating them on first use."""
+    fleet: WattBoxFleet | None = hass.data.get(DOMAIN_FLEET)
+    if fleet is None:
+        fleet = hass.data[DOMAIN_FLEET] = WattBoxFleet()
+    return fleet
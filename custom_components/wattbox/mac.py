@@ -0,0 +1,123 @@
+"""MAC address resolution for wattbox."""
+
+import asyncio
+import logging
+import time
+from typing import Final, TypedDict
+
+from getmac import get_mac_address
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, DOMAIN_MAC_RESOLVER, MAC_CACHE_TTL, MAC_MISS_TTL
+from .shared import async_get_shared
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY: Final[str] = f"{DOMAIN}.mac_addresses"
+STORAGE_VERSION: Final[int] = 1
+# Seconds to wait before writing cache changes to disk.
+SAVE_DELAY: Final[int] = 10
+
+
+class _CacheEntry(TypedDict):
+    mac: str | None
+    updated: float
+
+
+def _get_mac_address(ip: str) -> str | None:
+    """Get MAC address from IP using ARP table.
+
+    This does blocking I/O and must be run in the executor.
+
+    Args:
+        ip: IP address to lookup
+
+    Returns:
+        MAC address string or None if not found
+    """
+    try:
+        mac = get_mac_address(ip=ip)
+        if mac:
+            _LOGGER.debug("Found MAC address %s for IP %s", mac, ip)
+            return mac
+        else:
+            _LOGGER.debug("No MAC address found in ARP table for IP %s", ip)
+            return None
+    except Exception as err:
+        _LOGGER.debug("Error getting MAC address for IP %s: %s", ip, err)
+        return None
+
+
+class MacAddressResolver:
+    """Resolve and cache the MAC address of each host.
+
+    Lookups run in the executor and concurrent requests for the same host
+    share a single lookup. Found addresses are persisted so a restart does
+    not need to touch the ARP table at all.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._store: Store[dict[str, _CacheEntry]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY
+        )
+        self._cache: dict[str, _CacheEntry] = {}
+        self._pending: dict[str, asyncio.Task[str | None]] = {}
+
+    async def async_load(self) -> None:
+        """Load the persisted cache."""
+        if (data := await self._store.async_load()) is not None:
+            # Anything looked up while loading is newer.
+            self._cache = {**data, **self._cache}
+
+    def _is_fresh(self, entry: _CacheEntry) -> bool:
+        """Check if a cache entry is still within its TTL."""
+        ttl = MAC_CACHE_TTL if entry["mac"] else MAC_MISS_TTL
+        return time.time() - entry["updated"] < ttl.total_seconds()
+
+    async def async_get(self, host: str) -> str | None:
+        """Get the MAC address for a host."""
+        if (entry := self._cache.get(host)) is not None and self._is_fresh(entry):
+            return entry["mac"]
+
+        if (pending := self._pending.get(host)) is None:
+            pending = self.hass.async_create_task(
+                self._async_lookup(host), f"wattbox mac lookup {host}"
+            )
+            self._pending[host] = pending
+        # Shield so one cancelled caller does not cancel the lookup for others.
+        return await asyncio.shield(pending)
+
+    async def _async_lookup(self, host: str) -> str | None:
+        """Look up the MAC address in the executor and cache the result."""
+        try:
+            mac = await self.hass.async_add_executor_job(_get_mac_address, host)
+        finally:
+            self._pending.pop(host, None)
+
+        # Keep a previously found address over a failed lookup, the device
+        # may just not be in the ARP table right now.
+        if mac is None and (entry := self._cache.get(host)) and entry["mac"]:
+            mac = entry["mac"]
+        self._cache[host] = {"mac": mac, "updated": time.time()}
+        # Misses are not worth persisting, they expire quickly anyway.
+        if mac:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return mac
+
+    def _data_to_save(self) -> dict[str, _CacheEntry]:
+        """Return the found addresses to persist."""
+        return {host: entry for host, entry in self._cache.items() if entry["mac"]}
+
+
+async def async_get_mac_resolver(hass: HomeAssistant) -> MacAddressResolver:
+    """Get the shared resolver, loading it on first use."""
+    return await async_get_shared(hass, DOMAIN_MAC_RESOLVER, _async_load_resolver)
+
+
+async def _async_load_resolver(hass: HomeAssistant) -> MacAddressResolver:
+    """Create and load the resolver."""
+    resolver = MacAddressResolver(hass)
+    await resolver.async_load()
+    return resolver
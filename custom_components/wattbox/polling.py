@@ -0,0 +1,229 @@
+"""Tiered polling for wattbox."""
+
+import logging
+import time
+from collections.abc import Callable, Collection
+from datetime import timedelta
+from typing import TYPE_CHECKING, Final, NamedTuple
+
+from .const import (
+    OUTLET_METERING,
+    PUSH_RECONCILE_INTERVAL,
+    TIER_MEDIUM_INTERVAL,
+    TIER_SLOW_INTERVAL,
+)
+
+if TYPE_CHECKING:
+    from pywattbox.ip_wattbox import IpWattBox
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _parse_outlet_status(wattbox: "IpWattBox", result: str) -> None:
+    for i, status in enumerate(result.split(","), start=1):
+        if outlet := wattbox.outlets.get(i):
+            outlet.status = status == "1"
+
+
+def _parse_power_status(wattbox: "IpWattBox", result: str) -> None:
+    power_status = result.split(",")
+    wattbox.current_value = float(power_status[0])
+    wattbox.power_value = float(power_status[1])
+    wattbox.voltage_value = float(power_status[2])
+    # The light is green, but the value is "0", see IpWattBox.
+    wattbox.safe_voltage_status = power_status[3] == "0"
+
+
+def _parse_ups_status(wattbox: "IpWattBox", result: str) -> None:
+    ups_status = result.split(",")
+    wattbox.battery_charge = int(ups_status[0])
+    wattbox.battery_load = int(ups_status[1])
+    wattbox.battery_health = ups_status[2] == "Good"
+    wattbox.power_lost = ups_status[3] == "True"
+    wattbox.est_run_time = int(ups_status[4])
+    wattbox.audible_alarm = ups_status[5] == "True"
+    wattbox.mute = ups_status[6] == "True"
+
+
+def _parse_auto_reboot(wattbox: "IpWattBox", result: str) -> None:
+    wattbox.auto_reboot = result == "1"
+
+
+def _parse_outlet_name(wattbox: "IpWattBox", result: str) -> None:
+    for i, name in enumerate(result.split(","), start=1):
+        if outlet := wattbox.outlets.get(i):
+            outlet.name = name.lstrip("{").rstrip("}")
+
+
+def _parse_firmware(wattbox: "IpWattBox", result: str) -> None:
+    wattbox.firmware_version = result
+
+
+def _parse_ups_connection(wattbox: "IpWattBox", result: str) -> None:
+    wattbox.has_ups = result == "1"
+
+
+def _parse_outlet_power_status(wattbox: "IpWattBox", result: str) -> None:
+    index, power, current, voltage = result.split(",")
+    if outlet := wattbox.outlets.get(int(index)):
+        outlet.power_value = float(power)
+        outlet.current_value = float(current)
+        outlet.voltage_value = float(voltage)
+
+
+class _TieredRequest(NamedTuple):
+    request: str
+    # Sets the values of the response result, as IpWattBox would.
+    parse: Callable[["IpWattBox", str], None]
+    # None polls on every update.
+    interval: timedelta | None
+    # Resources that need the request, None if it is always needed.
+    resources: frozenset[str] | None
+
+
+# The requests IpWattBox.async_update sends, split by how often they change.
+# Per outlet power is one request per outlet, see _outlet_power_requests.
+TIERED_REQUESTS: Final[tuple[_TieredRequest, ...]] = (
+    _TieredRequest("?OutletStatus", _parse_outlet_status, None, None),
+    _TieredRequest(
+        "?PowerStatus",
+        _parse_power_status,
+        None,
+        frozenset(
+            ("current_value", "power_value", "voltage_value", "safe_voltage_status")
+        ),
+    ),
+    _TieredRequest(
+        "?UPSStatus",
+        _parse_ups_status,
+        TIER_MEDIUM_INTERVAL,
+        frozenset(
+            (
+                "audible_alarm",
+                "battery_charge",
+                "battery_health",
+                "battery_load",
+                "est_run_time",
+                "mute",
+                "power_lost",
+            )
+        ),
+    ),
+    _TieredRequest(
+        "?AutoReboot",
+        _parse_auto_reboot,
+        TIER_SLOW_INTERVAL,
+        frozenset(("auto_reboot",)),
+    ),
+    _TieredRequest("?OutletName", _parse_outlet_name, TIER_SLOW_INTERVAL, None),
+    _TieredRequest("?Firmware", _parse_firmware, TIER_SLOW_INTERVAL, None),
+    _TieredRequest(
+        "?UPSConnection",
+        _parse_ups_connection,
+        TIER_SLOW_INTERVAL,
+        frozenset(("has_ups",)),
+    ),
+)
+
+_OUTLET_STATUS: Final[_TieredRequest] = TIERED_REQUESTS[0]
+
+
+def _outlet_power_requests(wattbox: "IpWattBox") -> list[_TieredRequest]:
+    """Per outlet power requests, polled with the WattBox readings."""
+    if not wattbox.outlet_power_status:
+        return []
+    return [
+        _TieredRequest(
+            f"?OutletPowerStatus={index}",
+            _parse_outlet_power_status,
+            None,
+            frozenset((OUTLET_METERING,)),
+        )
+        for index in wattbox.outlets
+    ]
+
+
+class TieredPoller:
+    """Update an IP WattBox with only the requests that are due.
+
+    Outlet states and electrical readings are fetched on every poll, UPS
+    readings every TIER_MEDIUM_INTERVAL and names, flags and the firmware
+    every TIER_SLOW_INTERVAL. Requests that no enabled resource needs are
+    never sent. The first poll fetches every tier.
+
+    Once the WattBox has pushed a status on its own, the matching request
+    drops to PUSH_RECONCILE_INTERVAL, the pushed lines keep it current.
+    """
+
+    def __init__(
+        self,
+        wattbox: "IpWattBox",
+        resources: Collection[str],
+        scan_interval: timedelta,
+    ) -> None:
+        self.wattbox = wattbox
+        self.requests = [
+            tiered
+            for tiered in (*TIERED_REQUESTS, *_outlet_power_requests(wattbox))
+            if tiered.resources is None or tiered.resources.intersection(resources)
+        ]
+        # Half a scan interval of slack, so a tier is not pushed back a whole
+        # poll by jitter.
+        self._slack = scan_interval.total_seconds() / 2
+        self._last_fetch: dict[str, float] = {}
+        self._pushed: set[str] = set()
+
+    def _interval(self, tiered: _TieredRequest) -> float:
+        """Seconds between fetches of a request, 0 to fetch on every poll."""
+        interval = 0.0 if tiered.interval is None else tiered.interval.total_seconds()
+        if tiered.request in self._pushed:
+            return max(interval, PUSH_RECONCILE_INTERVAL.total_seconds())
+        return interval
+
+    def due_requests(self) -> list[_TieredRequest]:
+        """Return the requests due for this poll."""
+        now = time.monotonic()
+        return [
+            tiered
+            for tiered in self.requests
+            if (last := self._last_fetch.get(tiered.request)) is None
+            or now - last + self._slack >= self._interval(tiered)
+        ]
+
+    async def async_update(self) -> None:
+        """Send the due requests and parse the responses onto the WattBox."""
+        await self._async_fetch(self.due_requests())
+
+    async def async_update_outlets(self) -> None:
+        """Fetch only the outlet states, to confirm outlet commands."""
+        await self._async_fetch([_OUTLET_STATUS])
+
+    async def _async_fetch(self, requests: list[_TieredRequest]) -> None:
+        """Send the requests and parse the responses onto the WattBox."""
+        if not requests:
+            return
+        responses = await self.wattbox.async_send_requests(
+            tiered.request for tiered in requests
+        )
+        now = time.monotonic()
+        for tiered, response in zip(requests, responses, strict=True):
+            if response.failed:
+                _LOGGER.debug("%s failed for %s", tiered.request, self.wattbox)
+                continue
+            tiered.parse(self.wattbox, response.result)
+            self._last_fetch[tiered.request] = now
+
+    def handle_status(self, name: str, value: str) -> bool:
+        """Parse a status the WattBox pushed, False if it is not one we poll."""
+        # Per outlet requests carry the outlet index, as does their status.
+        requests = (f"?{name}", f"?{name}={value.split(',', 1)[0]}")
+        for tiered in self.requests:
+            if tiered.request in requests:
+                break
+        else:
+            return False
+        request = tiered.request
+        tiered.parse(self.wattbox, value)
+        self._pushed.add(request)
+        self._last_fetch[request] = time.monotonic()
+        return True
@@ -2,22 +2,189 @@
 
 import logging
 from datetime import timedelta
+from decimal import Decimal
+from typing import Final, TypedDict
 
-from homeassistant.components.integration.sensor import IntegrationSensor
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    RestoreSensor,
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, CONF_RESOURCES, STATE_UNKNOWN, UnitOfTime
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_NAME,
+    CONF_RESOURCES,
+    STATE_UNKNOWN,
+    EntityCategory,
+    UnitOfElectricCurrent,
+    UnitOfElectricPotential,
+    UnitOfEnergy,
+    UnitOfPower,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
-from .const import DOMAIN, DOMAIN_DATA, SENSOR_TYPES
+from .const import (
+    ATTR_SCAN_INTERVAL,
+    CONF_FLEET,
+    DOMAIN_DATA,
+    OUTLET_METERING,
+    PLUG_ICON,
+    SENSOR_TYPES,
+    STATISTICS_READINGS,
+    STATISTICS_TYPES,
+    STATISTICS_WINDOWS,
+)
+from .coordinator import outlet_key, statistics_key
 from .entity import WattBoxEntity
+from .fleet import WattBoxFleet, async_get_fleet
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class _DiagnosticSensorDict(TypedDict):
+    """TypedDict for use in DIAGNOSTIC_SENSOR_TYPES"""
+
+    name: str
+    unit: str | None
+    icon: str
+    device_class: SensorDeviceClass | None
+    # Values that change on every poll are left for users to enable.
+    enabled: bool
+
+
+# Sensors on how the integration talks to the WattBox, always added.
+DIAGNOSTIC_SENSOR_TYPES: Final[dict[str, _DiagnosticSensorDict]] = {
+    "poll_latency": {
+        "name": "Poll Latency",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "enabled": False,
+    },
+    "poll_latency_p95": {
+        "name": "Poll Latency P95",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-alert-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "enabled": False,
+    },
+    "command_latency": {
+        "name": "Command Latency",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-play-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "enabled": False,
+    },
+    "consecutive_failures": {
+        "name": "Consecutive Failures",
+        "unit": None,
+        "icon": "mdi:alert-circle-outline",
+        "device_class": None,
+        "enabled": True,
+    },
+    "last_success": {
+        "name": "Last Successful Update",
+        "unit": None,
+        "icon": "mdi:clock-check-outline",
+        "device_class": SensorDeviceClass.TIMESTAMP,
+        "enabled": True,
+    },
+}
+
+
+class _OutletSensorDict(TypedDict):
+    """TypedDict for use in OUTLET_SENSOR_TYPES"""
+
+    name: str
+    unit: str
+    icon: str
+    device_class: SensorDeviceClass
+    state_class: SensorStateClass
+    # The outlet voltage is the same as the WattBox voltage.
+    enabled: bool
+
+
+# Sensors added for every outlet with OUTLET_METERING.
+OUTLET_SENSOR_TYPES: Final[dict[str, _OutletSensorDict]] = {
+    "power_value": {
+        "name": "Power",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:lightbulb-outline",
+        "device_class": SensorDeviceClass.POWER,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "enabled": True,
+    },
+    "current_value": {
+        "name": "Current",
+        "unit": UnitOfElectricCurrent.AMPERE,
+        "icon": "mdi:current-ac",
+        "device_class": SensorDeviceClass.CURRENT,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "enabled": True,
+    },
+    "voltage_value": {
+        "name": "Voltage",
+        "unit": UnitOfElectricPotential.VOLT,
+        "icon": "mdi:lightning-bolt-circle",
+        "device_class": SensorDeviceClass.VOLTAGE,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "enabled": False,
+    },
+    "energy": {
+        "name": "Energy",
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        "icon": "mdi:lightning-bolt",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "enabled": True,
+    },
+}
+
+
+class _FleetSensorDict(TypedDict):
+    """TypedDict for use in FLEET_SENSOR_TYPES"""
+
+    name: str
+    unit: str | None
+    icon: str
+    device_class: SensorDeviceClass | None
+
+
+# Totals across all WattBoxes, and across the WattBoxes sharing a tag, by
+# FLEET_METRICS.
+FLEET_SENSOR_TYPES: Final[dict[str, _FleetSensorDict]] = {
+    "power_value": {
+        "name": "Total Power",
+        "unit": UnitOfPower.WATT,
+        "icon": "mdi:lightbulb-outline",
+        "device_class": SensorDeviceClass.POWER,
+    },
+    "current_value": {
+        "name": "Total Current",
+        "unit": UnitOfElectricCurrent.AMPERE,
+        "icon": "mdi:current-ac",
+        "device_class": SensorDeviceClass.CURRENT,
+    },
+    "outlets_on": {
+        "name": "Outlets On",
+        "unit": None,
+        "icon": PLUG_ICON,
+        "device_class": None,
+    },
+    "on_battery": {
+        "name": "On Battery",
+        "unit": None,
+        "icon": "mdi:battery-alert",
+        "device_class": None,
+    },
+}
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -26,11 +193,12 @@ async def async_setup_entry(
     """Set up WattBox sensors from a config entry."""
     try:
         conf_name: str = entry.data[CONF_NAME]
-        clean_name = conf_name.replace(" ", "_").lower()
-        entities: list[WattBoxSensor | WattBoxIntegrationSensor] = []
+        entities: list[SensorEntity] = []
 
         # Get available resources from entry data or use all sensor types
-        resources = entry.data.get(CONF_RESOURCES, list(SENSOR_TYPES.keys()))
+        resources = entry.data.get(
+            CONF_RESOURCES, [*SENSOR_TYPES.keys(), OUTLET_METERING]
+        )
 
         resource: str
         for resource in resources:
@@ -43,21 +211,23 @@ async def async_setup_entry(
                 _LOGGER.error("Failed to append WattBoxSensor: %s", err)
                 raise PlatformNotReady from err
 
-        # TODO: Add a setting for this, default to true?
-        # Add an IntegrationSensor, so end users don't have to manually configure it.
-        entities.append(
-            WattBoxIntegrationSensor(
-                hass=hass,
-                name=conf_name,
-                integration_method="trapezoidal",
-                sensor_name=f"{conf_name} Total Energy",
-                round_digits=2,
-                source_entity=f"sensor.{clean_name}_power",
-                unique_id=f"{clean_name}_total_energy",
-                unit_prefix="k",
-                unit_time=UnitOfTime.HOURS,
-                max_sub_interval=timedelta(minutes=5),
-            )
+        entities.extend(
+            WattBoxDiagnosticSensor(hass, conf_name, sensor_type)
+            for sensor_type in DIAGNOSTIC_SENSOR_TYPES
+        )
+
+        # Energy is integrated from the power readings, so end users don't
+        # have to configure it themselves.
+        if "power_value" in resources:
+            entities.append(WattBoxEnergySensor(hass, conf_name))
+        if OUTLET_METERING in resources:
+            entities.extend(_outlet_sensors(hass, conf_name))
+        entities.extend(
+            WattBoxStatisticsSensor(hass, conf_name, reading, statistic, window)
+            for reading in STATISTICS_READINGS
+            if reading in resources
+            for window in STATISTICS_WINDOWS
+            for statistic in STATISTICS_TYPES
         )
 
         async_add_entities(entities)
@@ -73,13 +243,16 @@ async def async_setup_platform(
     discovery_info: DiscoveryInfoType,
 ) -> None:
     """Setup sensor platform (legacy YAML support)."""
+    if discovery_info.get(CONF_FLEET):
+        _async_setup_fleet(hass, async_add_entities)
+        return
     try:
         conf_name: str = discovery_info[CONF_NAME]
-        clean_name = conf_name.replace(" ", "_").lower()
-        entities: list[WattBoxSensor | WattBoxIntegrationSensor] = []
+        entities: list[SensorEntity] = []
 
+        resources: list[str] = discovery_info[CONF_RESOURCES]
         resource: str
-        for resource in discovery_info[CONF_RESOURCES]:
+        for resource in resources:
             if (sensor_type := resource.lower()) not in SENSOR_TYPES:
                 continue
 
@@ -89,21 +262,23 @@ async def async_setup_platform(
                 _LOGGER.error("Failed to append WattBoxSensor: %s", err)
                 raise PlatformNotReady from err
 
-        # TODO: Add a setting for this, default to true?
-        # Add an IntegrationSensor, so end users don't have to manually configure it.
-        entities.append(
-            WattBoxIntegrationSensor(
-                hass=hass,
-                name=conf_name,
-                integration_method="trapezoidal",
-                sensor_name=f"{conf_name} Total Energy",
-                round_digits=2,
-                source_entity=f"sensor.{clean_name}_power",
-                unique_id=f"{clean_name}_total_energy",
-                unit_prefix="k",
-                unit_time=UnitOfTime.HOURS,
-                max_sub_interval=timedelta(minutes=5),
-            )
+        entities.extend(
+            WattBoxDiagnosticSensor(hass, conf_name, sensor_type)
+            for sensor_type in DIAGNOSTIC_SENSOR_TYPES
+        )
+
+        # Energy is integrated from the power readings, so end users don't
+        # have to configure it themselves.
+        if "power_value" in resources:
+            entities.append(WattBoxEnergySensor(hass, conf_name))
+        if OUTLET_METERING in resources:
+            entities.extend(_outlet_sensors(hass, conf_name))
+        entities.extend(
+            WattBoxStatisticsSensor(hass, conf_name, reading, statistic, window)
+            for reading in STATISTICS_READINGS
+            if reading in resources
+            for window in STATISTICS_WINDOWS
+            for statistic in STATISTICS_TYPES
         )
 
         async_add_entities(entities)
@@ -122,80 +297,227 @@ class WattBoxSensor(WattBoxEntity, SensorEntity):
         self._attr_native_unit_of_measurement = SENSOR_TYPES[self.sensor_type]["unit"]
         self._attr_icon = SENSOR_TYPES[self.sensor_type]["icon"]
         self._attr_unique_id = f"{self._wattbox.serial_number}-sensor-{sensor_type}"
+        self._snapshot_keys = (sensor_type, ATTR_SCAN_INTERVAL)
+        self._async_update_attrs()
 
-    async def async_update(self) -> None:
+    @callback
+    def _async_update_attrs(self) -> None:
         """Update the sensor."""
         # Check the data and update the value.
-        self._attr_native_value = getattr(
-            self._wattbox, self.sensor_type, STATE_UNKNOWN
+        self._attr_native_value = self.coordinator.data.get(
+            self.sensor_type, STATE_UNKNOWN
         )
+        # Effective poll interval in seconds, stretched on slow devices.
+        self._attr_extra_state_attributes[ATTR_SCAN_INTERVAL] = self.coordinator.data[
+            ATTR_SCAN_INTERVAL
+        ]
+
+
+class WattBoxDiagnosticSensor(WattBoxEntity, SensorEntity):
+    """WattBox sensor on the connection to the device."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, hass: HomeAssistant, name: str, sensor_type: str) -> None:
+        super().__init__(hass, name, sensor_type)
+        self.sensor_type: str = sensor_type
+        sensor = DIAGNOSTIC_SENSOR_TYPES[sensor_type]
+        self._attr_name = f"{name} {sensor['name']}"
+        self._attr_native_unit_of_measurement = sensor["unit"]
+        self._attr_device_class = sensor["device_class"]
+        self._attr_icon = sensor["icon"]
+        self._attr_entity_registry_enabled_default = sensor["enabled"]
+        self._attr_unique_id = f"{self._wattbox.serial_number}-sensor-{sensor_type}"
+        self._snapshot_keys = (sensor_type,)
+        self._async_update_attrs()
+
+    @property
+    def available(self) -> bool:
+        """Return True, these matter most when the WattBox is unreachable."""
+        return True
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the sensor."""
+        self._attr_native_value = self.coordinator.data.get(self.sensor_type)
+
+
+class WattBoxEnergySensor(WattBoxEntity, RestoreSensor):
+    """WattBox total energy, integrated from the power readings."""
+
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_suggested_display_precision = 2
 
+    def __init__(self, hass: HomeAssistant, name: str) -> None:
+        super().__init__(hass, name)
+        self._attr_name = f"{name} Total Energy"
+        # The unique id of the integration sensor this replaced, to keep its
+        # history and entity id.
+        self._attr_unique_id = f"{name.replace(' ', '_').lower()}_total_energy"
+        self._snapshot_keys = ("total_energy",)
+        self._async_update_attrs()
 
-class WattBoxIntegrationSensor(IntegrationSensor):
-    """WattBox Integration Sensor that includes device info."""
+    async def async_added_to_hass(self) -> None:
+        """Carry over the last total if none was persisted with the snapshot."""
+        await super().async_added_to_hass()
+        if self.coordinator.energy.restored:
+            return
+        last = await self.async_get_last_sensor_data()
+        # Skips None as well, and the dates a sensor may hold.
+        if last is None or not isinstance(
+            last.native_value, (int, float, Decimal, str)
+        ):
+            return
+        try:
+            total = float(last.native_value)
+        except ValueError:
+            return
+        self.coordinator.async_restore_energy(total)
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the sensor."""
+        self._attr_native_value = self.coordinator.data.get("total_energy")
+
+
+class WattBoxStatisticsSensor(WattBoxEntity, SensorEntity):
+    """WattBox rolling min, max or mean of a reading."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    # Many per WattBox, users enable the ones they alert on.
+    _attr_entity_registry_enabled_default = False
 
     def __init__(
         self,
         hass: HomeAssistant,
         name: str,
-        integration_method: str,
-        sensor_name: str,
-        source_entity: str,
-        unique_id: str,
-        unit_prefix: str,
-        unit_time: UnitOfTime,
-        round_digits: int = 2,
-        max_sub_interval: timedelta | None = None,
+        reading: str,
+        statistic: str,
+        window: timedelta,
     ) -> None:
-        # Use a default max_sub_interval if none provided
-        if max_sub_interval is None:
-            max_sub_interval = timedelta(minutes=5)
-
-        # Initialize IntegrationSensor with all required parameters
-        super().__init__(
-            hass=hass,
-            integration_method=integration_method,
-            name=sensor_name,
-            round_digits=round_digits,
-            source_entity=source_entity,
-            unique_id=unique_id,
-            unit_prefix=unit_prefix,
-            unit_time=unit_time,
-            max_sub_interval=max_sub_interval,
+        super().__init__(hass, name, reading)
+        self._key = statistics_key(reading, statistic, window)
+        minutes = round(window.total_seconds() / 60)
+        self._attr_name = (
+            f"{name} {SENSOR_TYPES[reading]['name']} "
+            f"{statistic.capitalize()} {minutes}m"
         )
+        self._attr_native_unit_of_measurement = SENSOR_TYPES[reading]["unit"]
+        self._attr_icon = SENSOR_TYPES[reading]["icon"]
+        self._attr_unique_id = f"{self._wattbox.serial_number}-sensor-{self._key}"
+        self._snapshot_keys = (self._key,)
+        self._async_update_attrs()
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the sensor."""
+        self._attr_native_value = self.coordinator.data.get(self._key)
+
+
+class WattBoxOutletSensor(WattBoxEntity, SensorEntity):
+    """WattBox per outlet reading."""
 
-        # Get the WattBox instance to create device info
-        self._wattbox = hass.data[DOMAIN_DATA][name]
-
-        # Set device info manually
-        from getmac import get_mac_address
-        from homeassistant.const import ATTR_CONNECTIONS
-        from homeassistant.helpers import device_registry as dr
-        from homeassistant.helpers.entity import DeviceInfo
-
-        device_info = DeviceInfo(
-            identifiers={(DOMAIN, self._wattbox.serial_number)},
-            name=name,
-            manufacturer="WattBox",
-            model=getattr(self._wattbox, "hardware_version", None) or "WattBox",
-            sw_version=getattr(self._wattbox, "firmware_version", None),
-            serial_number=self._wattbox.serial_number,
-            configuration_url=(
-                f"http://{self._wattbox.host}:{self._wattbox.port}"
-                if hasattr(self._wattbox, "host") and hasattr(self._wattbox, "port")
-                else None
-            ),
+    def __init__(
+        self, hass: HomeAssistant, name: str, index: int, sensor_type: str
+    ) -> None:
+        super().__init__(hass, name, index, sensor_type)
+        self.sensor_type: str = sensor_type
+        sensor = OUTLET_SENSOR_TYPES[sensor_type]
+        outlet_name = (self._wattbox.outlets[index].name or "").strip()
+        self._attr_name = f"{name} {outlet_name or f'Outlet {index}'} {sensor['name']}"
+        self._attr_native_unit_of_measurement = sensor["unit"]
+        self._attr_device_class = sensor["device_class"]
+        self._attr_state_class = sensor["state_class"]
+        self._attr_icon = sensor["icon"]
+        self._attr_entity_registry_enabled_default = sensor["enabled"]
+        self._attr_unique_id = (
+            f"{self._wattbox.serial_number}-outlet-{index}-{sensor_type}"
         )
+        self._key = outlet_key(index, sensor_type)
+        self._snapshot_keys = (self._key,)
+        self._async_update_attrs()
 
-        # Add MAC address connection if host is available
-        if hasattr(self._wattbox, "host") and self._wattbox.host:
-            try:
-                mac_address = get_mac_address(ip=self._wattbox.host)
-                if mac_address:
-                    device_info[ATTR_CONNECTIONS] = {
-                        (dr.CONNECTION_NETWORK_MAC, mac_address)
-                    }
-            except Exception:
-                pass  # MAC address lookup is optional
-
-        self._attr_device_info = device_info
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the sensor."""
+        self._attr_native_value = self.coordinator.data.get(self._key)
+
+
+def _outlet_sensors(hass: HomeAssistant, conf_name: str) -> list[SensorEntity]:
+    """Create the per outlet sensors, if the WattBox meters its outlets.
+
+    Only IP WattBoxes report per outlet readings, and not every model does.
+    """
+    wattbox = hass.data[DOMAIN_DATA][conf_name].wattbox
+    if not getattr(wattbox, "outlet_power_status", False):
+        return []
+    return [
+        WattBoxOutletSensor(hass, conf_name, index, sensor_type)
+        for index in wattbox.outlets
+        for sensor_type in OUTLET_SENSOR_TYPES
+    ]
+
+
+class WattBoxFleetSensor(SensorEntity):
+    """Total of a value across a group of WattBoxes."""
+
+    _attr_should_poll = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, fleet: WattBoxFleet, group: str | None, metric: str) -> None:
+        self._fleet = fleet
+        self._group = group
+        self._metric = metric
+        sensor = FLEET_SENSOR_TYPES[metric]
+        self._attr_name = f"WattBox {group or 'Fleet'} {sensor['name']}"
+        self._attr_native_unit_of_measurement = sensor["unit"]
+        self._attr_device_class = sensor["device_class"]
+        self._attr_icon = sensor["icon"]
+        self._attr_unique_id = (
+            f"fleet-{metric}" if group is None else f"fleet-{group}-{metric}"
+        )
+        self._attr_extra_state_attributes = {}
+        self._async_update_attrs()
+
+    async def async_added_to_hass(self) -> None:
+        """Register for changes to the totals of the group."""
+        self.async_on_remove(
+            self._fleet.async_add_listener(self._group, self._handle_fleet_update)
+        )
+        # The group is created before the values that created it are added.
+        self._async_update_attrs()
+
+    @callback
+    def _handle_fleet_update(self) -> None:
+        """Handle changed totals."""
+        self._async_update_attrs()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the sensor."""
+        # Rounded, the running total of differences picks up float noise.
+        self._attr_native_value = round(
+            self._fleet.totals[self._group][self._metric], 2
+        )
+        self._attr_extra_state_attributes["members"] = self._fleet.members[self._group]
+
+
+@callback
+def _async_setup_fleet(
+    hass: HomeAssistant, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Add the fleet totals, and those of any group added later."""
+    fleet = async_get_fleet(hass)
+
+    @callback
+    def _async_add_group(group: str | None) -> None:
+        async_add_entities(
+            WattBoxFleetSensor(fleet, group, metric) for metric in FLEET_SENSOR_TYPES
+        )
+
+    fleet.on_group_added = _async_add_group
+    for group in fleet.totals:
+        _async_add_group(group)
@@ -0,0 +1,143 @@
+"""Services for wattbox."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Final
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import device_registry as dr
+from homeassistant.util.json import JsonValueType
+from pywattbox.base import Commands
+
+from .const import DOMAIN, DOMAIN_DATA
+from .coordinator import WattBoxCoordinator, to_milliseconds
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SET_OUTLETS: Final[str] = "set_outlets"
+
+ATTR_ACTION: Final[str] = "action"
+ATTR_DEVICE: Final[str] = "device"
+ATTR_OUTLET: Final[str] = "outlet"
+ATTR_OUTLETS: Final[str] = "outlets"
+
+ACTIONS: Final[dict[str, Commands]] = {
+    "on": Commands.ON,
+    "off": Commands.OFF,
+    "reset": Commands.RESET,
+}
+
+SET_OUTLETS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_OUTLETS): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema(
+                    {
+                        # The WattBox name, or its device id.
+                        vol.Required(ATTR_DEVICE): cv.string,
+                        # 0 is the master switch, on WattBoxes that have one.
+                        vol.Required(ATTR_OUTLET): vol.All(
+                            vol.Coerce(int), vol.Range(min=0)
+                        ),
+                        vol.Required(ATTR_ACTION): vol.In(ACTIONS),
+                    }
+                )
+            ],
+        )
+    }
+)
+
+
+def _find_coordinator(hass: HomeAssistant, device: str) -> WattBoxCoordinator | None:
+    """Find a WattBox by its name or the id of its device."""
+    coordinators: dict[str, WattBoxCoordinator] = hass.data.get(DOMAIN_DATA, {})
+    if (coordinator := coordinators.get(device)) is not None:
+        return coordinator
+    if (entry := dr.async_get(hass).async_get(device)) is None:
+        return None
+    serials = {
+        identifier for domain, identifier in entry.identifiers if domain == DOMAIN
+    }
+    for coordinator in coordinators.values():
+        if coordinator.wattbox.serial_number in serials:
+            return coordinator
+    return None
+
+
+async def _async_set_outlet(
+    coordinator: WattBoxCoordinator, index: int, action: str
+) -> tuple[str | None, float]:
+    """Send an action to an outlet, returning any error and the time taken."""
+    start = time.monotonic()
+    wattbox = coordinator.wattbox
+    outlet = wattbox.master_outlet if index == 0 else wattbox.outlets.get(index)
+    if outlet is None:
+        return f"{coordinator.name} has no outlet {index}", 0.0
+    try:
+        await coordinator.async_send_command(outlet, ACTIONS[action])
+    except Exception as err:
+        return str(err), time.monotonic() - start
+    return None, time.monotonic() - start
+
+
+async def _async_set_outlets(call: ServiceCall) -> ServiceResponse:
+    """Send a list of outlet actions, to different WattBoxes concurrently.
+
+    Each WattBox serializes its own commands through its command queue, and
+    batches the ones that arrive together.
+    """
+    start = time.monotonic()
+    requests: list[dict[str, Any]] = call.data[ATTR_OUTLETS]
+    results: list[dict[str, JsonValueType]] = [
+        {**request, "success": False, "error": None, "elapsed_ms": 0}
+        for request in requests
+    ]
+
+    tasks: list[asyncio.Future[tuple[str | None, float]]] = []
+    pending: list[dict[str, JsonValueType]] = []
+    for request, result in zip(requests, results, strict=True):
+        coordinator = _find_coordinator(call.hass, request[ATTR_DEVICE])
+        if coordinator is None:
+            result["error"] = f"Unknown WattBox {request[ATTR_DEVICE]}"
+            continue
+        tasks.append(
+            asyncio.ensure_future(
+                _async_set_outlet(
+                    coordinator, request[ATTR_OUTLET], request[ATTR_ACTION]
+                )
+            )
+        )
+        pending.append(result)
+
+    outcomes = await asyncio.gather(*tasks)
+    for result, (error, elapsed) in zip(pending, outcomes, strict=True):
+        result["success"] = error is None
+        result["error"] = error
+        result["elapsed_ms"] = to_milliseconds(elapsed)
+
+    elapsed = time.monotonic() - start
+    _LOGGER.debug("Set %s outlets in %.3f seconds", len(results), elapsed)
+    # Copied into a list of JSON values, as lists do not widen on their own.
+    return {"results": list(results), "elapsed_ms": to_milliseconds(elapsed)}
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_OUTLETS,
+        _async_set_outlets,
+        schema=SET_OUTLETS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
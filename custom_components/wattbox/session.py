@@ -0,0 +1,363 @@
+"""Session management for wattbox."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from contextlib import suppress
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, TypeVar
+from weakref import WeakKeyDictionary
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from pywattbox.base import BaseWattBox
+
+from .const import (
+    DOMAIN_SESSION_SLOTS,
+    KEEPALIVE_INTERVAL,
+    KEEPALIVE_TIMEOUT,
+    MAX_SESSIONS_PER_HOST,
+    SESSION_SLOT_TIMEOUT,
+    STATUS_PREFIX,
+)
+from .trace import WattBoxTrace
+
+if TYPE_CHECKING:
+    import httpx
+    from pywattbox.ip_wattbox import REQUEST_MESSAGES, IpWattBox
+    from scrapli.response import Response
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class WattBoxSession:
+    """Serialize all I/O to a single WattBox.
+
+    Polls and outlet commands both run through `async_run`, so they never
+    compete for the connection.
+    """
+
+    def __init__(self, hass: HomeAssistant, wattbox: BaseWattBox) -> None:
+        self.hass = hass
+        self.wattbox = wattbox
+        self.last_activity = time.monotonic()
+        self.trace = WattBoxTrace()
+        self._lock = asyncio.Lock()
+        self._request_starts: "WeakKeyDictionary[httpx.Request, float]" = (
+            WeakKeyDictionary()
+        )
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the last job succeeded, HTTP has no session to go bad."""
+        return True
+
+    async def async_setup(self) -> None:
+        """Trace the requests of the HTTP client."""
+        client: "httpx.AsyncClient | None" = getattr(self.wattbox, "async_client", None)
+        if client is not None:
+            hooks = client.event_hooks
+            client.event_hooks = {
+                "request": [*hooks["request"], self._async_trace_request],
+                "response": [*hooks["response"], self._async_trace_response],
+            }
+
+    async def _async_trace_request(self, request: "httpx.Request") -> None:
+        """Note when a request was sent."""
+        self._request_starts[request] = time.monotonic()
+
+    async def _async_trace_response(self, response: "httpx.Response") -> None:
+        """Add a response to the trace."""
+        request = response.request
+        start = self._request_starts.pop(request, None)
+        length = response.headers.get("content-length")
+        self.trace.record(
+            f"{request.method} {request.url.path}",
+            None if start is None else time.monotonic() - start,
+            int(length) if length and length.isdigit() else None,
+            None if response.is_success else f"HTTP {response.status_code}",
+        )
+
+    async def async_run(
+        self, job: Callable[[], Awaitable[_T]], *, retry: bool = False
+    ) -> _T:
+        """Run a job against the WattBox, one at a time."""
+        async with self._lock:
+            start = time.monotonic()
+            try:
+                return await job()
+            except Exception as err:
+                self._trace_failure(job, start, err)
+                raise
+            finally:
+                self.last_activity = time.monotonic()
+
+    def _trace_failure(
+        self, job: Callable[[], Awaitable[Any]], start: float, error: Exception
+    ) -> None:
+        """Add a failed job to the trace, its requests may never have finished."""
+        name = getattr(getattr(job, "func", job), "__name__", repr(job))
+        self.trace.record(name, time.monotonic() - start, error=repr(error))
+
+    async def async_close(self) -> None:
+        """Close the HTTP client."""
+        if (client := getattr(self.wattbox, "async_client", None)) is not None:
+            await client.aclose()
+
+
+class IpWattBoxSession(WattBoxSession):
+    """Keep a telnet/SSH session to a WattBox logged in.
+
+    Idle sessions are kept alive with a cheap request, which also catches
+    half-open connections before a poll or command runs into them. A failed
+    job reconnects right away, so the next one does not pay for the login.
+    Logged in sessions per host are bounded, as the WattBox only accepts a
+    few at a time.
+
+    Between jobs the session listens for status lines the WattBox sends on
+    its own, such as an outlet switched from the front panel, and passes
+    them to on_status. A job interrupts the listener before it takes the
+    session. Lines pushed while a job runs end up in its responses, they are
+    taken out and handled before the responses are parsed.
+    """
+
+    wattbox: "IpWattBox"
+
+    def __init__(self, hass: HomeAssistant, wattbox: "IpWattBox") -> None:
+        super().__init__(hass, wattbox)
+        self._healthy = True
+        self._slot: asyncio.Semaphore | None = None
+        self._unsub_keepalive: CALLBACK_TYPE | None = None
+        # Called with the name and value of each unsolicited status line.
+        self.on_status: Callable[[str, str], None] | None = None
+        self._listener: asyncio.Task[None] | None = None
+        self._read: asyncio.Future[bytes] | None = None
+        # Set while the connection is known good, so the listener has
+        # something to read from.
+        self._connected = asyncio.Event()
+        self._buffer = b""
+        # Jobs waiting for or holding the session.
+        self._pending = 0
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the last job on the session succeeded."""
+        return self._healthy
+
+    async def async_setup(self) -> None:
+        """Claim a session slot for the host and start the keepalive."""
+        slots: dict[str, asyncio.Semaphore] = self.hass.data.setdefault(
+            DOMAIN_SESSION_SLOTS, {}
+        )
+        slot = slots.setdefault(
+            self.wattbox.host, asyncio.Semaphore(MAX_SESSIONS_PER_HOST)
+        )
+        async with asyncio.timeout(SESSION_SLOT_TIMEOUT):
+            await slot.acquire()
+        self._slot = slot
+        self._wrap_requests()
+        self._unsub_keepalive = async_track_time_interval(
+            self.hass,
+            self._async_keepalive,
+            KEEPALIVE_INTERVAL,
+            name=f"wattbox {self.wattbox.host} keepalive",
+        )
+        self._listener = self.hass.async_create_background_task(
+            self._async_listen(), name=f"wattbox {self.wattbox.host} listener"
+        )
+
+    async def async_run(
+        self, job: Callable[[], Awaitable[_T]], *, retry: bool = False
+    ) -> _T:
+        """Run a job, reconnecting if the session turns out to be dead.
+
+        Only jobs that are safe to repeat should set retry, an outlet reset
+        that failed half way should not be sent twice.
+        """
+        self._pending += 1
+        if self._read is not None:
+            self._read.cancel()
+        try:
+            return await self._async_run(job, retry)
+        finally:
+            self._pending -= 1
+
+    async def _async_run(self, job: Callable[[], Awaitable[_T]], retry: bool) -> _T:
+        """Run a job once the listener has let go of the session."""
+        async with self._lock:
+            # A partial line left by the listener would be joined to
+            # whatever it reads after the job.
+            self._buffer = b""
+            start = time.monotonic()
+            try:
+                result = await job()
+            except Exception as err:
+                _LOGGER.debug("Session to %s failed: %s", self.wattbox.host, err)
+                self._trace_failure(job, start, err)
+                self._healthy = False
+                self._connected.clear()
+                if not retry:
+                    with suppress(Exception):
+                        await self._async_reconnect()
+                    raise
+                await self._async_reconnect()
+                result = await job()
+            finally:
+                self.last_activity = time.monotonic()
+            self._healthy = True
+            self._connected.set()
+            return result
+
+    async def _async_listen(self) -> None:
+        """Read unsolicited status lines while no job is running."""
+        while True:
+            await self._connected.wait()
+            async with self._lock:
+                if self._pending:
+                    continue
+                # Straight from the transport, its read has a timeout that
+                # closes the connection when the WattBox has nothing to say.
+                stdout = self.wattbox.async_driver.transport.stdout
+                self._read = asyncio.ensure_future(stdout.read(65535))
+                try:
+                    data = await self._read
+                except asyncio.CancelledError:
+                    current = asyncio.current_task()
+                    if current is not None and current.cancelling():
+                        raise
+                    # A job wants the session.
+                    continue
+                except Exception as err:
+                    _LOGGER.debug("Listener on %s failed: %s", self.wattbox.host, err)
+                    data = b""
+                finally:
+                    self._read = None
+                if not data:
+                    # Closed, the next job reconnects.
+                    self._healthy = False
+                    self._connected.clear()
+                    continue
+            self._handle_output(data)
+
+    def _handle_output(self, data: bytes | str) -> None:
+        """Pass the complete status lines in the output to on_status."""
+        if isinstance(data, str):
+            data = data.encode()
+        *lines, self._buffer = (self._buffer + data).split(b"\n")
+        for raw in lines:
+            self._handle_line(raw.decode(errors="replace").strip(), len(raw))
+
+    def _handle_line(self, line: str, size: int) -> None:
+        """Pass a status line to on_status, ignoring anything else."""
+        if not line.startswith(STATUS_PREFIX):
+            if line:
+                _LOGGER.debug("Ignoring %r from %s", line, self.wattbox.host)
+            return
+        name, _, value = line.removeprefix(STATUS_PREFIX).partition("=")
+        self.trace.record(line, None, size)
+        if self.on_status is not None:
+            self.on_status(name, value)
+
+    def _take_status_lines(self, response: "Response") -> None:
+        """Handle the status lines the WattBox pushed during a request.
+
+        They end up in the output of whichever request was running, where the
+        driver can take one for the answer. They are taken out and the rest
+        is parsed again the way the driver does it.
+        """
+        prefix = STATUS_PREFIX.encode()
+        if prefix not in response.raw_result:
+            return
+        kept = []
+        for raw in response.raw_result.strip().splitlines():
+            if (line := raw.strip()).startswith(prefix):
+                self._handle_line(line.decode(errors="replace"), len(raw))
+            else:
+                kept.append(raw)
+        # The echo of the request comes first, queries answer with name=value.
+        if response.channel_input.startswith("?") and len(kept) > 1:
+            result = kept[1].split(b"=")[-1]
+        else:
+            result = kept[-1] if kept else b""
+        response.result = result.decode(errors="replace")
+        response.failed = any(
+            error in response.result for error in response.failed_when_contains or ()
+        )
+
+    def _wrap_requests(self) -> None:
+        """Wrap async_send_requests to trace requests and handle pushed lines."""
+        send_requests = self.wattbox.async_send_requests
+        trace = self.trace
+
+        async def _async_send_requests(
+            requests: Iterable["REQUEST_MESSAGES | str"],
+        ) -> list["Response"]:
+            responses = await send_requests(requests)
+            for response in responses:
+                self._take_status_lines(response)
+                trace.record(
+                    response.channel_input,
+                    response.elapsed_time,
+                    len(response.raw_result),
+                    response.result if response.failed else None,
+                )
+            return responses
+
+        # pywattbox calls it through the instance, so this catches all of them.
+        self.wattbox.async_send_requests = _async_send_requests  # type: ignore[method-assign]
+
+    async def _async_reconnect(self) -> None:
+        """Drop the current connection and log in again."""
+        driver = self.wattbox.async_driver
+        with suppress(Exception):
+            await driver.close()
+        await driver.open()
+        _LOGGER.debug("Reconnected session to %s", self.wattbox.host)
+
+    async def _async_ping(self) -> None:
+        """Send a cheap request to keep the session alive."""
+        async with asyncio.timeout(KEEPALIVE_TIMEOUT):
+            await self.wattbox.async_send_requests(("?Firmware",))
+
+    async def _async_keepalive(self, _now: datetime) -> None:
+        """Ping the session if it has been idle."""
+        # Busy sessions do not need it, and unhealthy ones are left to the
+        # coordinator so they follow its backoff.
+        idle = time.monotonic() - self.last_activity
+        if (
+            not self._healthy
+            or self._pending
+            or idle < KEEPALIVE_INTERVAL.total_seconds() / 2
+        ):
+            return
+        try:
+            await self.async_run(self._async_ping, retry=True)
+        except Exception as err:
+            _LOGGER.debug("Keepalive to %s failed: %s", self.wattbox.host, err)
+
+    async def async_close(self) -> None:
+        """Log out and release the session slot."""
+        if self._unsub_keepalive is not None:
+            self._unsub_keepalive()
+            self._unsub_keepalive = None
+        if self._listener is not None:
+            self._listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        async with self._lock:
+            with suppress(Exception):
+                await self.wattbox.async_driver.close()
+        if self._slot is not None:
+            self._slot.release()
+            self._slot = None
+
+
+def create_session(hass: HomeAssistant, wattbox: BaseWattBox) -> WattBoxSession:
+    """Create the session type matching the WattBox transport."""
+    if wattbox.port in (22, 23):
+        return IpWattBoxSession(hass, wattbox)  # type: ignore[arg-type]
+    return WattBoxSession(hass, wattbox)
@@ -0,0 +1,40 @@
+"""Values shared by every WattBox, kept in hass.data."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from homeassistant.core import HomeAssistant
+
+_T = TypeVar("_T")
+
+
+async def async_get_shared(
+    hass: HomeAssistant,
+    key: str,
+    load: Callable[[HomeAssistant], Awaitable[_T]],
+) -> _T:
+    """Get the value kept under key, loading it on first use.
+
+    WattBoxes are set up concurrently, so callers arriving while it loads
+    wait for the same load instead of finding it still empty. A failed load
+    is dropped, so the next caller tries again.
+    """
+    loading: asyncio.Task[_T] | None = hass.data.get(key)
+    if loading is None:
+        loading = hass.data[key] = hass.async_create_task(
+            _async_load(hass, key, load), f"{key} load"
+        )
+    # Shield so one cancelled caller does not cancel the load for others.
+    return await asyncio.shield(loading)
+
+
+async def _async_load(
+    hass: HomeAssistant, key: str, load: Callable[[HomeAssistant], Awaitable[_T]]
+) -> _T:
+    """Run the load, forgetting it on failure."""
+    try:
+        return await load(hass)
+    except Exception:
+        hass.data.pop(key, None)
+        raise
@@ -0,0 +1,109 @@
+"""Rolling statistics for wattbox."""
+
+from array import array
+from collections import deque
+
+
+class RollingWindow:
+    """Min, max and mean of the samples within a time window.
+
+    Samples are kept in fixed size arrays used as a ring buffer, so memory
+    stays bounded however long it runs. If samples arrive faster than the
+    capacity allows for, the oldest are dropped before they expire.
+
+    Adding a sample is O(1) amortized. The mean comes from a running sum,
+    min and max from monotonic queues of sample numbers, whose heads are the
+    current min and max.
+    """
+
+    __slots__ = (
+        "_count",
+        "_maxima",
+        "_minima",
+        "_seq",
+        "_sum",
+        "_times",
+        "_values",
+        "capacity",
+        "window",
+    )
+
+    def __init__(self, window: float, capacity: int) -> None:
+        self.window = window
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Samples added so far, the newest is _seq - 1 and the oldest kept
+        # is _seq - _count. Their slot is the number modulo the capacity.
+        self._seq = 0
+        self._count = 0
+        self._sum = 0.0
+        self._minima: deque[int] = deque()
+        self._maxima: deque[int] = deque()
+
+    def add(self, now: float, value: float) -> None:
+        """Add a sample taken at monotonic time now."""
+        self.expire(now)
+        if self._count == self.capacity:
+            self._drop_oldest()
+        seq = self._seq
+        slot = seq % self.capacity
+        self._times[slot] = now
+        self._values[slot] = value
+        self._sum += value
+        self._count += 1
+        self._seq += 1
+
+        values = self._values
+        capacity = self.capacity
+        minima = self._minima
+        while minima and values[minima[-1] % capacity] >= value:
+            minima.pop()
+        minima.append(seq)
+        maxima = self._maxima
+        while maxima and values[maxima[-1] % capacity] <= value:
+            maxima.pop()
+        maxima.append(seq)
+
+    def expire(self, now: float) -> None:
+        """Drop the samples that are older than the window."""
+        cutoff = now - self.window
+        while self._count and self._times[self._oldest % self.capacity] < cutoff:
+            self._drop_oldest()
+
+    @property
+    def _oldest(self) -> int:
+        return self._seq - self._count
+
+    def _drop_oldest(self) -> None:
+        oldest = self._oldest
+        self._count -= 1
+        if self._count:
+            self._sum -= self._values[oldest % self.capacity]
+        else:
+            # Start over, so rounding errors do not build up in the sum.
+            self._sum = 0.0
+        if self._minima and self._minima[0] == oldest:
+            self._minima.popleft()
+        if self._maxima and self._maxima[0] == oldest:
+            self._maxima.popleft()
+
+    @property
+    def count(self) -> int:
+        """Number of samples in the window."""
+        return self._count
+
+    @property
+    def min(self) -> float | None:
+        """Smallest sample in the window."""
+        return self._values[self._minima[0] % self.capacity] if self._count else None
+
+    @property
+    def max(self) -> float | None:
+        """Largest sample in the window."""
+        return self._values[self._maxima[0] % self.capacity] if self._count else None
+
+    @property
+    def mean(self) -> float | None:
+        """Mean of the samples in the window."""
+        return self._sum / self._count if self._count else None
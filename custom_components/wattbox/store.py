@@ -0,0 +1,88 @@
+"""Persisted device snapshots for wattbox."""
+
+import logging
+from typing import Any, Final, NotRequired, TypedDict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, DOMAIN_SNAPSHOT_STORE, SNAPSHOT_SAVE_DELAY
+from .shared import async_get_shared
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY: Final[str] = f"{DOMAIN}.snapshots"
+STORAGE_VERSION: Final[int] = 1
+
+# WattBox attributes that identify the device and its outlet table.
+INFO_KEYS: Final[tuple[str, ...]] = (
+    "firmware_version",
+    "hardware_version",
+    "has_ups",
+    "hostname",
+    "number_outlets",
+    "serial_number",
+)
+
+
+class StoredSnapshot(TypedDict):
+    host: str
+    port: int | None
+    info: dict[str, Any]
+    data: dict[str, Any]
+    # Total energy in kWh, not in snapshots from before it was tracked.
+    energy: NotRequired[float]
+    # Per outlet energy in kWh, keyed by the outlet index.
+    outlet_energy: NotRequired[dict[str, float]]
+
+
+class WattBoxSnapshotStore:
+    """Keep the last snapshot of every WattBox, keyed by name.
+
+    Snapshots change on nearly every poll, so they are written at most once
+    per SNAPSHOT_SAVE_DELAY, and once more when Home Assistant stops.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store: Store[dict[str, StoredSnapshot]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY
+        )
+        self._snapshots: dict[str, StoredSnapshot] = {}
+        self._save_pending = False
+
+    async def async_load(self) -> None:
+        """Load the persisted snapshots."""
+        if (data := await self._store.async_load()) is not None:
+            self._snapshots = {**data, **self._snapshots}
+
+    @callback
+    def async_get(self, name: str) -> StoredSnapshot | None:
+        """Get the last snapshot of a WattBox."""
+        return self._snapshots.get(name)
+
+    @callback
+    def async_set(self, name: str, snapshot: StoredSnapshot) -> None:
+        """Replace the snapshot of a WattBox and schedule a save."""
+        self._snapshots[name] = snapshot
+        # Not re-arming a pending save keeps it from being pushed back by
+        # every poll.
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, StoredSnapshot]:
+        """Return the snapshots to persist."""
+        self._save_pending = False
+        return self._snapshots
+
+
+async def async_get_snapshot_store(hass: HomeAssistant) -> WattBoxSnapshotStore:
+    """Get the shared snapshot store, loading it on first use."""
+    return await async_get_shared(hass, DOMAIN_SNAPSHOT_STORE, _async_load_store)
+
+
+async def _async_load_store(hass: HomeAssistant) -> WattBoxSnapshotStore:
+    """Create and load the store."""
+    store = WattBoxSnapshotStore(hass)
+    await store.async_load()
+    return store
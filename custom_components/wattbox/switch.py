@@ -7,13 +7,14 @@ from typing import Any
 from homeassistant.components.switch import SwitchDeviceClass, SwitchEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
-from pywattbox.base import BaseWattBox, Outlet
+from pywattbox.base import BaseWattBox, Commands, Outlet
 
 from .const import CONF_NAME_REGEXP, CONF_SKIP_REGEXP, DOMAIN_DATA, PLUG_ICON
+from .coordinator import outlet_key
 from .entity import WattBoxEntity
 
 _LOGGER = logging.getLogger(__name__)
@@ -39,7 +40,7 @@ async def async_setup_entry(
         name: str = entry.data[CONF_NAME]
 
         entities: list[WattBoxEntity] = []
-        wattbox: BaseWattBox = hass.data[DOMAIN_DATA][name]
+        wattbox: BaseWattBox = hass.data[DOMAIN_DATA][name].wattbox
 
         # For config entries, we'll include all outlets by default
         # TODO: Add options for name_regexp and skip_regexp in config flow
@@ -99,7 +100,7 @@ async def async_setup_platform(
         name: str = discovery_info[CONF_NAME]
 
         entities: list[WattBoxEntity] = []
-        wattbox: BaseWattBox = hass.data[DOMAIN_DATA][name]
+        wattbox: BaseWattBox = hass.data[DOMAIN_DATA][name].wattbox
 
         name_regexp = validate_regex(config, CONF_NAME_REGEXP)
         skip_regexp = validate_regex(config, CONF_SKIP_REGEXP)
@@ -148,73 +149,81 @@ class WattBoxBinarySwitch(WattBoxEntity, SwitchEntity):
 
     _attr_device_class = SwitchDeviceClass.OUTLET
     _attr_icon = PLUG_ICON
-    _outlet: Outlet
 
     def __init__(
         self, hass: HomeAssistant, name: str, index: int, outlet_name: str = ""
     ) -> None:
         super().__init__(hass, name, index)
-        # Master Outlet (index == 0) is not in the oulets dict
-        if index:
-            self._outlet = self._wattbox.outlets[index]
+        self._index = index
         # Determine outlet name
         if outlet_name := outlet_name.strip():
             self._attr_name = f"{name} {outlet_name}"
         else:
             self._attr_name = f"{name} Outlet {index}"
         self._attr_unique_id = f"{self._wattbox.serial_number}-switch-{index}"
+        self._status_key = outlet_key(index, "status")
+        self._name_key = outlet_key(index, "name")
+        self._method_key = outlet_key(index, "method")
+        self._snapshot_keys = (self._status_key, self._name_key, self._method_key)
+        # Master Outlet (index == 0) is not in the outlets dict
+        if index:
+            # Static, so it is set once instead of on every update.
+            self._attr_extra_state_attributes["index"] = index
+            self._async_update_attrs()
 
-    async def async_update(self) -> None:
+    @callback
+    def _async_update_attrs(self) -> None:
         """Update the sensor."""
         # Check the data and update the value.
-        self._attr_is_on = self._outlet.status
+        self._attr_is_on = self.coordinator.data.get(self._status_key)
 
         # Set/update attributes
-        self._attr_extra_state_attributes["name"] = self._outlet.name
-        self._attr_extra_state_attributes["method"] = self._outlet.method
-        self._attr_extra_state_attributes["index"] = self._outlet.index
+        data = self.coordinator.data
+        self._attr_extra_state_attributes["name"] = data.get(self._name_key)
+        self._attr_extra_state_attributes["method"] = data.get(self._method_key)
+
+    @property
+    def _outlet(self) -> Outlet:
+        """Return the outlet, the initial update replaces the Outlet objects."""
+        return self._wattbox.outlets[self._index]
 
     async def async_turn_on(self, **_kwargs: Any) -> None:
         """Turn on the switch."""
         _LOGGER.debug("Turning On: %s - %s", self._wattbox, self._outlet)
         _LOGGER.debug(
-            "Current Outlet Before: %s - %s", self._outlet.status, repr(self._outlet)
+            "Current Outlet Before: %s - %r", self._outlet.status, self._outlet
         )
-        # Update state first so it is not stale.
-        self._attr_is_on = True
-        self.async_write_ha_state()
-        # Trigger the action on the wattbox.
-        await self._outlet.async_turn_on()
+        # Update state first so it is not stale, then trigger the action on
+        # the wattbox.
+        await self.coordinator.async_send_command(self._outlet, Commands.ON)
 
     async def async_turn_off(self, **_kwargs: Any) -> None:
         """Turn off the switch."""
         _LOGGER.debug("Turning Off: %s - %s", self._wattbox, self._outlet)
         _LOGGER.debug(
-            "Current Outlet Before: %s - %s", self._outlet.status, repr(self._outlet)
+            "Current Outlet Before: %s - %r", self._outlet.status, self._outlet
         )
-        # Update state first so it is not stale.
-        self._attr_is_on = False
-        self.async_write_ha_state()
-        # Trigger the action on the wattbox.
-        await self._outlet.async_turn_off()
+        # Update state first so it is not stale, then trigger the action on
+        # the wattbox.
+        await self.coordinator.async_send_command(self._outlet, Commands.OFF)
 
 
 class WattBoxMasterSwitch(WattBoxBinarySwitch):
     """WattBox master switch class."""
 
-    _outlet: Outlet | None  # type: ignore[assignment]
-
     def __init__(self, hass: HomeAssistant, name: str) -> None:
         super().__init__(hass, name, 0)
-        self._outlet = self._wattbox.master_outlet
         self._attr_name = f"{name} Master Switch"
         self._attr_unique_id = f"{self._wattbox.serial_number}-switch-master"
+        self._snapshot_keys = (self._status_key,)
+        self._async_update_attrs()
 
-    async def async_update(self) -> None:
+    @callback
+    def _async_update_attrs(self) -> None:
         """Update the sensor."""
         if self._outlet is not None:
             # Check the data and update the value.
-            self._attr_is_on = self._outlet.status
+            self._attr_is_on = self.coordinator.data.get(self._status_key)
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on the switch."""
@@ -224,4 +233,9 @@ class WattBoxMasterSwitch(WattBoxBinarySwitch):
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off the switch."""
         if self._outlet is not None:
-            await super().async_turn_on(**kwargs)
+            await super().async_turn_off(**kwargs)
+
+    @property
+    def _outlet(self) -> Outlet | None:  # type: ignore[override]
+        """Return the master outlet, if the WattBox has one."""
+        return self._wattbox.master_outlet
@@ -0,0 +1,51 @@
+"""Device I/O trace for wattbox."""
+
+import time
+from collections import deque
+from typing import TypedDict
+
+from .const import TRACE_SIZE
+
+
+class TraceEntry(TypedDict):
+    time: float
+    request: str
+    duration_ms: float | None
+    size: int | None
+    ok: bool
+    error: str | None
+
+
+class WattBoxTrace:
+    """Keep the most recent requests to a WattBox.
+
+    Recording is a bounded append per request, cheap enough to leave on, so
+    what a device was doing can be seen in the diagnostics without turning
+    on debug logging first.
+    """
+
+    def __init__(self, size: int = TRACE_SIZE) -> None:
+        self._entries: deque[TraceEntry] = deque(maxlen=size)
+
+    def record(
+        self,
+        request: str,
+        duration: float | None,
+        size: int | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Add a request, with its duration in seconds and response size."""
+        self._entries.append(
+            {
+                "time": time.time(),
+                "request": request,
+                "duration_ms": None if duration is None else round(duration * 1000, 1),
+                "size": size,
+                "ok": error is None,
+                "error": error,
+            }
+        )
+
+    def as_list(self) -> list[TraceEntry]:
+        """Return the recorded requests, oldest first."""
+        return list(self._entries)
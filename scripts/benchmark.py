@@ -0,0 +1,276 @@
+"""Benchmark one poll cycle of the integration inside Home Assistant.
+
+Builds N fake WattBoxes with M outlets each, with all of their entities, and
+runs poll cycles through the coordinators. Each cycle changes the readings
+and flips a share of the outlets, then the coordinator snapshots, diffs and
+notifies the entities, which update their attributes and write their state.
+
+Reports the CPU time per cycle, the peak memory allocated per cycle and the
+number of state changes. Results can be saved as a baseline and later runs
+compared against it.
+
+Needs the development requirements (scripts/setup). Usage:
+    python scripts/benchmark.py --devices 10 --outlets 12 --save
+    python scripts/benchmark.py --devices 10 --outlets 12 --compare
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from homeassistant import loader  # noqa: E402
+from homeassistant.components.binary_sensor import (  # noqa: E402
+    DOMAIN as BINARY_SENSOR_DOMAIN,
+)
+from homeassistant.components.button import DOMAIN as BUTTON_DOMAIN  # noqa: E402
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN  # noqa: E402
+from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN  # noqa: E402
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import Event, HomeAssistant, callback  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+from homeassistant.helpers.entity_platform import EntityPlatform  # noqa: E402
+from pywattbox.base import BaseWattBox, Commands, Outlet  # noqa: E402
+
+from custom_components.wattbox.binary_sensor import WattBoxBinarySensor  # noqa: E402
+from custom_components.wattbox.button import WattBoxResetButton  # noqa: E402
+from custom_components.wattbox.const import (  # noqa: E402
+    BINARY_SENSOR_TYPES,
+    DOMAIN,
+    DOMAIN_DATA,
+    SENSOR_TYPES,
+)
+from custom_components.wattbox.coordinator import WattBoxCoordinator  # noqa: E402
+from custom_components.wattbox.entity import WattBoxEntity  # noqa: E402
+from custom_components.wattbox.sensor import WattBoxSensor  # noqa: E402
+from custom_components.wattbox.switch import (  # noqa: E402
+    WattBoxBinarySwitch,
+    WattBoxMasterSwitch,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+BASELINE = Path(__file__).parent.parent / ".benchmarks" / "wattbox.json"
+
+
+class FakeWattBox(BaseWattBox):
+    """A WattBox whose updates change its values in a repeatable way."""
+
+    def __init__(self, index: int, outlets: int, churn: float) -> None:
+        # No host, so the coordinator does not look up a MAC address.
+        super().__init__("", "wattbox", "wattbox", 80)
+        self.churn = churn
+        self.rng = random.Random(index)
+        self.hardware_version = f"WB-800-IPVM-{outlets}"
+        self.firmware_version = "2.7.0.0"
+        self.has_ups = True
+        self.hostname = f"wattbox-{index}"
+        self.serial_number = f"BENCH{index:07}"
+        self.number_outlets = outlets
+        self.outlets = {i: Outlet(i, self) for i in range(1, outlets + 1)}
+        for outlet in self.outlets.values():
+            outlet.name = f"Outlet {outlet.index}"
+            outlet.method = True
+            outlet.status = True
+        # Kept as an Outlet, master_outlet is typed as optional.
+        self.master = self.master_outlet = Outlet(0, self)
+
+    def get_initial(self) -> None:
+        """Nothing to fetch, the values are set up front."""
+
+    async def async_get_initial(self) -> None:
+        self.get_initial()
+
+    def update(self) -> None:
+        """Change the readings and flip some of the outlets."""
+        rng = self.rng
+        self.voltage_value = round(rng.uniform(118, 122), 1)
+        self.power_value = float(rng.randint(100, 1500))
+        self.current_value = round(self.power_value / self.voltage_value, 1)
+        self.battery_load = rng.randint(10, 30)
+        for outlet in self.outlets.values():
+            if rng.random() < self.churn:
+                outlet.status = not outlet.status
+        self.master.status = all(outlet.status for outlet in self.outlets.values())
+
+    async def async_update(self) -> None:
+        self.update()
+
+    def send_command(self, outlet: int, command: Commands) -> None:
+        raise NotImplementedError
+
+    async def async_send_command(self, outlet: int, command: Commands) -> None:
+        raise NotImplementedError
+
+
+async def async_build(
+    hass: HomeAssistant, devices: int, outlets: int, churn: float
+) -> list[WattBoxCoordinator]:
+    """Create the coordinators and add all of their entities."""
+    hass.data[DOMAIN_DATA] = {}
+    coordinators = []
+    entities: dict[str, list[WattBoxEntity]] = {
+        SENSOR_DOMAIN: [],
+        BINARY_SENSOR_DOMAIN: [],
+        SWITCH_DOMAIN: [],
+        BUTTON_DOMAIN: [],
+    }
+    for index in range(devices):
+        name = f"WattBox {index}"
+        coordinator = WattBoxCoordinator(hass, name, FakeWattBox(index, outlets, churn))
+        await coordinator.async_setup()
+        hass.data[DOMAIN_DATA][name] = coordinator
+        coordinators.append(coordinator)
+
+        entities[SENSOR_DOMAIN].extend(
+            WattBoxSensor(hass, name, key) for key in SENSOR_TYPES
+        )
+        entities[BINARY_SENSOR_DOMAIN].extend(
+            WattBoxBinarySensor(hass, name, key) for key in BINARY_SENSOR_TYPES
+        )
+        entities[SWITCH_DOMAIN].append(WattBoxMasterSwitch(hass, name))
+        entities[SWITCH_DOMAIN].extend(
+            WattBoxBinarySwitch(hass, name, i) for i in range(1, outlets + 1)
+        )
+        entities[BUTTON_DOMAIN].extend(
+            WattBoxResetButton(hass, name, i) for i in range(1, outlets + 1)
+        )
+
+    # Added through platforms like the integration's, so they get entity ids
+    # and registry entries the same way.
+    for domain, domain_entities in entities.items():
+        platform = EntityPlatform(
+            hass=hass,
+            logger=_LOGGER,
+            domain=domain,
+            platform_name=DOMAIN,
+            platform=None,
+            scan_interval=timedelta(seconds=30),
+            entity_namespace=None,
+        )
+        await platform.async_add_entities(domain_entities)
+    return coordinators
+
+
+async def async_cycle(coordinators: list[WattBoxCoordinator]) -> None:
+    """Run one refresh on every coordinator."""
+    for coordinator in coordinators:
+        await coordinator.async_refresh()
+
+
+async def async_run(args: argparse.Namespace) -> dict[str, float]:
+    """Run the benchmark and return its results."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        # Writing state looks up integrations, and adding entities needs the
+        # registries.
+        loader.async_setup(hass)
+        await er.async_load(hass)
+        coordinators = await async_build(hass, args.devices, args.outlets, args.churn)
+
+        state_changes = 0
+
+        @callback
+        def _count(_event: Event) -> None:
+            nonlocal state_changes
+            state_changes += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, _count)
+
+        for _ in range(args.warmup):
+            await async_cycle(coordinators)
+        await hass.async_block_till_done()
+        state_changes = 0
+
+        cpu: list[float] = []
+        for _ in range(args.cycles):
+            start = time.process_time()
+            await async_cycle(coordinators)
+            cpu.append(time.process_time() - start)
+        await hass.async_block_till_done()
+        changes_per_cycle = state_changes / args.cycles
+
+        # Separate pass, tracing allocations slows everything down.
+        peaks: list[int] = []
+        tracemalloc.start()
+        for _ in range(args.cycles):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await async_cycle(coordinators)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+
+        for coordinator in coordinators:
+            await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+
+    return {
+        "cpu_median_ms": statistics.median(cpu) * 1000,
+        "cpu_min_ms": min(cpu) * 1000,
+        "cpu_mean_ms": statistics.mean(cpu) * 1000,
+        "alloc_peak_kib": statistics.median(peaks) / 1024,
+        "state_changes": changes_per_cycle,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--outlets", type=int, default=12)
+    parser.add_argument(
+        "--churn", type=float, default=0.1, help="Share of outlets flipped per poll"
+    )
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="Save as the baseline")
+    parser.add_argument(
+        "--compare", action="store_true", help="Compare against the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent the CPU median may regress before --compare fails",
+    )
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in ("devices", "outlets", "churn")}
+    results = asyncio.run(async_run(args))
+    print(f"{args.devices} devices x {args.outlets} outlets, {args.cycles} cycles:")
+    for key, value in results.items():
+        print(f"  {key:>16}: {value:10.3f}")
+
+    if args.compare:
+        saved: dict[str, Any] = json.loads(args.baseline.read_text())
+        if saved["config"] != config:
+            sys.exit(f"Baseline was run with {saved['config']}, not {config}")
+        print("Compared to the baseline:")
+        for key, value in results.items():
+            if previous := saved["results"].get(key):
+                print(f"  {key:>16}: {(value - previous) / previous:+10.1%}")
+        regression = results["cpu_median_ms"] / saved["results"]["cpu_median_ms"] - 1
+        if regression * 100 > args.threshold:
+            sys.exit(f"CPU time per cycle regressed by {regression:.1%}")
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps({"config": config, "results": results}, indent=2) + "\n"
+        )
+        print(f"Saved the baseline to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
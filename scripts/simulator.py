@@ -0,0 +1,611 @@
+"""Simulate a WattBox, or record and replay a real one.
+
+The simulator serves the HTTP API (wattbox_info.xml and control.cgi) and the
+telnet integration protocol, and the SSH one too when asyncssh is installed.
+Outlet count, latency, jitter and failures are configurable, and a seed makes
+the latency and failures repeatable. The IP protocol can also push status
+lines on its own, as a WattBox does when an outlet is switched from the front
+panel, both between requests and in the middle of a response.
+
+Recording proxies plain TCP to a real WattBox and writes every chunk in both
+directions to a JSON lines file. Replaying serves those chunks back byte for
+byte, the Nth connection getting the Nth recorded one. This works for HTTP
+and telnet, SSH is encrypted so it can not be recorded.
+
+Usage:
+    python scripts/simulator.py simulate --outlets 12 --latency 0.05
+    python scripts/simulator.py simulate --push-interval 5 --push-in-response 0.1
+    python scripts/simulator.py record --target 192.168.1.20 --port 23 --file box.jsonl
+    python scripts/simulator.py replay --file box.jsonl --port 2323
+
+Then point a WattBox at 127.0.0.1 with the matching port. Only 22 and 23 use
+the IP protocol in the integration, so use those ports (as root, or with port
+forwarding) for the IP protocol, and any other port for HTTP.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+_LOGGER = logging.getLogger("wattbox.simulator")
+
+# HTTP command values and IP protocol actions, as in pywattbox Commands.
+HTTP_COMMANDS = {0: "OFF", 1: "ON", 3: "RESET"}
+IP_ACTIONS = ("OFF", "ON", "RESET", "TOGGLE")
+LOGGED_IN = "Successfully Logged In!\n"
+# Seconds between the two login messages of a telnet session.
+TELNET_LOGIN_GAP = 0.1
+
+
+class InjectedFailure(Exception):
+    """Raised to drop a connection on purpose."""
+
+
+@dataclass
+class Faults:
+    """Latency and failures to inject into every response."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Chance of answering a request with an error.
+    error_rate: float = 0.0
+    # Chance of dropping the connection instead of answering.
+    drop_rate: float = 0.0
+    rng: random.Random = field(default_factory=random.Random)
+
+    async def async_delay(self) -> None:
+        """Wait the configured latency, plus or minus the jitter."""
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def check(self) -> bool:
+        """Return if the request should fail, raise if it should be dropped."""
+        if self.drop_rate and self.rng.random() < self.drop_rate:
+            raise InjectedFailure
+        return bool(self.error_rate) and self.rng.random() < self.error_rate
+
+
+@dataclass
+class Pushes:
+    """Unsolicited status lines to send over the IP protocol."""
+
+    # Seconds between pushes while the session is idle, 0 for none.
+    interval: float = 0.0
+    # Chance of a push landing between the echo of a request and its answer.
+    in_response: float = 0.0
+    rng: random.Random = field(default_factory=random.Random)
+
+    def check(self) -> bool:
+        """Return if a push should go into the current response."""
+        return bool(self.in_response) and self.rng.random() < self.in_response
+
+
+@dataclass
+class SimulatedWattBox:
+    """The state of a simulated WattBox."""
+
+    outlets: int = 12
+    username: str = "wattbox"
+    password: str = "wattbox"
+    hostname: str = "wattbox-sim"
+    serial_number: str = "SIM000000001"
+    firmware_version: str = "2.7.0.0"
+    has_ups: bool = True
+    voltage: float = 120.0
+    status: list[bool] = field(default_factory=list)
+    method: list[bool] = field(default_factory=list)
+    names: list[str] = field(default_factory=list)
+    load: list[float] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.status = self.status or [True] * self.outlets
+        self.method = self.method or [True] * self.outlets
+        self.names = self.names or [f"Outlet {i}" for i in range(1, self.outlets + 1)]
+        # A fixed load per outlet, so the totals are predictable.
+        self.load = self.load or [10.0 + 5.0 * i for i in range(self.outlets)]
+
+    @property
+    def hardware_version(self) -> str:
+        return f"WB-800-IPVM-{self.outlets}"
+
+    def outlet_power(self, index: int) -> float:
+        return self.load[index - 1] if self.status[index - 1] else 0.0
+
+    @property
+    def power(self) -> float:
+        return sum(self.outlet_power(i) for i in range(1, self.outlets + 1))
+
+    @property
+    def current(self) -> float:
+        return self.power / self.voltage
+
+    def set_outlet(self, index: int, action: str) -> None:
+        """Apply an outlet action, a reset turns the outlet back on."""
+        if not 1 <= index <= self.outlets:
+            raise ValueError(f"No outlet {index}")
+        if action == "TOGGLE":
+            self.status[index - 1] = not self.status[index - 1]
+        else:
+            self.status[index - 1] = action != "OFF"
+
+    def front_panel_toggle(self, rng: random.Random) -> str:
+        """Switch a random outlet, returning the status line the WattBox pushes."""
+        self.set_outlet(rng.randint(1, self.outlets), "TOGGLE")
+        return "~OutletStatus=" + ",".join(str(int(s)) for s in self.status)
+
+    def info_xml(self) -> str:
+        """Render wattbox_info.xml."""
+        values: dict[str, Any] = {
+            "host_name": self.hostname,
+            "hardware_version": self.hardware_version,
+            "serial_number": self.serial_number,
+            "hasUPS": int(self.has_ups),
+            "audible_alarm": 0,
+            "auto_reboot": 1,
+            "cloud_status": 1,
+            "mute": 0,
+            "power_lost": 0,
+            "safe_voltage_status": 1,
+            "power_value": round(self.power),
+            # The API reports these two in tenths.
+            "current_value": round(self.current * 10),
+            "voltage_value": round(self.voltage * 10),
+            "battery_charge": 100,
+            "battery_health": 1,
+            "battery_load": 20,
+            "battery_test": 0,
+            "est_run_time": 60,
+            "outlet_name": ",".join(self.names),
+            "outlet_status": ",".join(str(int(s)) for s in self.status),
+            "outlet_method": ",".join(str(int(m)) for m in self.method),
+        }
+        body = "".join(f"<{key}>{value}</{key}>" for key, value in values.items())
+        return f'<?xml version="1.0"?><request>{body}</request>'
+
+    def ip_response(self, request: str) -> str:
+        """Answer a single integration protocol request."""
+        command, _, argument = request.partition("=")
+        if command == "!OutletSet":
+            outlet, action, *_delay = argument.split(",")
+            if action not in IP_ACTIONS:
+                raise ValueError(f"Unknown action {action}")
+            self.set_outlet(int(outlet), action)
+            return "OK"
+        if command == "?OutletPowerStatus":
+            index = int(argument)
+            power = self.outlet_power(index)
+            value = f"{index},{power:.2f},{power / self.voltage:.2f},{self.voltage:.1f}"
+        else:
+            value = {
+                "?Firmware": self.firmware_version,
+                "?Hostname": self.hostname,
+                "?ServiceTag": self.serial_number,
+                "?Model": self.hardware_version,
+                "?OutletCount": str(self.outlets),
+                "?OutletStatus": ",".join(str(int(s)) for s in self.status),
+                # The last value is 0 when the voltage is safe.
+                "?PowerStatus": f"{self.current:.2f},{self.power:.2f},{self.voltage:.1f},0",
+                "?AutoReboot": "1",
+                "?OutletName": ",".join(f"{{{name}}}" for name in self.names),
+                "?UPSStatus": "100,20,Good,False,60,False,False",
+                "?UPSConnection": str(int(self.has_ups)),
+            }[command]
+        return f"{command}={value}"
+
+
+def _ip_answer(wattbox: SimulatedWattBox, faults: Faults, request: str) -> str:
+    """Answer a request, or with an error when it fails."""
+    if faults.check():
+        return "#Error"
+    try:
+        return wattbox.ip_response(request)
+    except (KeyError, ValueError):
+        return "#Error"
+
+
+async def _async_ip_session(
+    wattbox: SimulatedWattBox,
+    faults: Faults,
+    pushes: Pushes,
+    readline: Any,
+    write: Any,
+) -> None:
+    """Run a logged in integration protocol session."""
+    write(LOGGED_IN)
+    busy = False
+
+    async def _async_push() -> None:
+        """Push a status line every interval, unless a request is running."""
+        while True:
+            await asyncio.sleep(pushes.interval)
+            if not busy:
+                write(f"{wattbox.front_panel_toggle(pushes.rng)}\n")
+
+    pusher = asyncio.create_task(_async_push()) if pushes.interval else None
+    try:
+        while line := await readline():
+            request = line.strip()
+            if not request:
+                continue
+            if request == "!Exit":
+                return
+            busy = True
+            await faults.async_delay()
+            # The WattBox echoes the request before answering it.
+            write(f"{request}\n")
+            if pushes.check():
+                write(f"{wattbox.front_panel_toggle(pushes.rng)}\n")
+            write(f"{_ip_answer(wattbox, faults, request)}\n")
+            busy = False
+    finally:
+        if pusher is not None:
+            pusher.cancel()
+
+
+async def async_serve_telnet(
+    wattbox: SimulatedWattBox, faults: Faults, pushes: Pushes, host: str, port: int
+) -> asyncio.Server:
+    """Serve the integration protocol over telnet."""
+
+    async def _handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        async def readline() -> str:
+            return (await reader.readline()).decode(errors="replace")
+
+        def write(text: str) -> None:
+            writer.write(text.encode())
+
+        try:
+            write("Please Login to Access the WattBox\nUsername: ")
+            username = (await readline()).strip()
+            write("Password: ")
+            password = (await readline()).strip()
+            if (username, password) != (wattbox.username, wattbox.password):
+                write("Invalid Login\n")
+                return
+            # scrapli's telnet login reads up to the first login message, and
+            # pywattbox then waits for another one before its first request.
+            # The gap keeps them in separate reads.
+            write(LOGGED_IN)
+            await writer.drain()
+            await asyncio.sleep(TELNET_LOGIN_GAP)
+            await _async_ip_session(wattbox, faults, pushes, readline, write)
+        except (InjectedFailure, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(_handle, host, port)
+
+
+async def async_serve_ssh(
+    wattbox: SimulatedWattBox, faults: Faults, pushes: Pushes, host: str, port: int
+) -> Any:
+    """Serve the integration protocol over SSH, if asyncssh is installed."""
+    try:
+        import asyncssh
+    except ImportError:
+        _LOGGER.warning("asyncssh is not installed, not serving SSH")
+        return None
+
+    class _Server(asyncssh.SSHServer):
+        def password_auth_supported(self) -> bool:
+            return True
+
+        def validate_password(self, username: str, password: str) -> bool:
+            return (username, password) == (wattbox.username, wattbox.password)
+
+    async def _handle(process: Any) -> None:
+        try:
+            await _async_ip_session(
+                wattbox, faults, pushes, process.stdin.readline, process.stdout.write
+            )
+        except (InjectedFailure, ConnectionError):
+            pass
+        finally:
+            process.exit(0)
+
+    return await asyncssh.create_server(
+        _Server,
+        host,
+        port,
+        server_host_keys=[asyncssh.generate_private_key("ssh-ed25519")],
+        process_factory=_handle,
+    )
+
+
+def _http_response(
+    wattbox: SimulatedWattBox, faults: Faults, target: str, authorized: bool
+) -> tuple[str, str]:
+    """Answer a single HTTP request with its status and body."""
+    url = urlsplit(target)
+    if not authorized:
+        return "401 Unauthorized", ""
+    if faults.check():
+        return "500 Internal Server Error", ""
+    if url.path == "/wattbox_info.xml":
+        return "200 OK", wattbox.info_xml()
+    if url.path == "/control.cgi":
+        query = parse_qs(url.query)
+        try:
+            wattbox.set_outlet(
+                int(query["outlet"][0]), HTTP_COMMANDS[int(query["command"][0])]
+            )
+        except (KeyError, ValueError):
+            return "400 Bad Request", ""
+        return "200 OK", ""
+    return "404 Not Found", ""
+
+
+async def async_serve_http(
+    wattbox: SimulatedWattBox, faults: Faults, host: str, port: int
+) -> asyncio.Server:
+    """Serve wattbox_info.xml and control.cgi."""
+    credentials = base64.b64encode(
+        f"{wattbox.username}:{wattbox.password}".encode()
+    ).decode()
+
+    async def _handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            # Keep alive until the client closes, as httpx reuses connections.
+            while request_line := (await reader.readline()).decode():
+                _method, target, _version = request_line.split()
+                headers = {}
+                while (line := (await reader.readline()).decode()).strip():
+                    key, _, value = line.partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                await faults.async_delay()
+                status, body = _http_response(
+                    wattbox,
+                    faults,
+                    target,
+                    headers.get("authorization") == f"Basic {credentials}",
+                )
+                data = body.encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: text/xml\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+        except (InjectedFailure, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(_handle, host, port)
+
+
+async def async_record(
+    host: str, port: int, target: str, target_port: int, path: Path
+) -> asyncio.Server:
+    """Proxy to a real WattBox, recording every chunk to a file."""
+    connections = 0
+    log = path.open("a")
+
+    async def _handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        nonlocal connections
+        connection = connections
+        connections += 1
+        start = time.monotonic()
+        device_reader, device_writer = await asyncio.open_connection(
+            target, target_port
+        )
+
+        async def _pipe(
+            source: asyncio.StreamReader, sink: asyncio.StreamWriter, direction: str
+        ) -> None:
+            while data := await source.read(65536):
+                event = {
+                    "connection": connection,
+                    "direction": direction,
+                    "time": round(time.monotonic() - start, 6),
+                    "data": base64.b64encode(data).decode(),
+                }
+                log.write(json.dumps(event) + "\n")
+                log.flush()
+                sink.write(data)
+                await sink.drain()
+            sink.close()
+
+        try:
+            await asyncio.gather(
+                _pipe(reader, device_writer, "client"),
+                _pipe(device_reader, writer, "device"),
+            )
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            device_writer.close()
+
+    return await asyncio.start_server(_handle, host, port)
+
+
+async def async_replay(
+    host: str, port: int, path: Path, realtime: bool, loop_recording: bool
+) -> asyncio.Server:
+    """Serve recorded connections back, byte for byte."""
+    recorded: dict[int, list[dict[str, Any]]] = {}
+    with path.open() as log:
+        for line in log:
+            event = json.loads(line)
+            recorded.setdefault(event["connection"], []).append(event)
+    conversations = [recorded[key] for key in sorted(recorded)]
+    connections = 0
+
+    async def _handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        nonlocal connections
+        index = connections
+        connections += 1
+        if index >= len(conversations):
+            if not loop_recording:
+                _LOGGER.warning("Connection %s was not recorded", index)
+                writer.close()
+                return
+            index %= len(conversations)
+        start = time.monotonic()
+        try:
+            for event in conversations[index]:
+                data = base64.b64decode(event["data"])
+                if event["direction"] == "client":
+                    received = await reader.readexactly(len(data))
+                    if received != data:
+                        _LOGGER.warning(
+                            "Connection %s: expected %r, got %r", index, data, received
+                        )
+                    continue
+                if (
+                    realtime
+                    and (wait := event["time"] - (time.monotonic() - start)) > 0
+                ):
+                    await asyncio.sleep(wait)
+                writer.write(data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(_handle, host, port)
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Start the requested servers and run until interrupted."""
+    servers: list[Any] = []
+    if args.mode == "simulate":
+        wattbox = SimulatedWattBox(
+            outlets=args.outlets, username=args.username, password=args.password
+        )
+        faults = Faults(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            drop_rate=args.drop_rate,
+            rng=random.Random(args.seed),
+        )
+        pushes = Pushes(
+            interval=args.push_interval,
+            in_response=args.push_in_response,
+            rng=random.Random(args.seed),
+        )
+        servers.append(
+            await async_serve_http(wattbox, faults, args.host, args.http_port)
+        )
+        servers.append(
+            await async_serve_telnet(
+                wattbox, faults, pushes, args.host, args.telnet_port
+            )
+        )
+        if args.ssh_port:
+            servers.append(
+                await async_serve_ssh(wattbox, faults, pushes, args.host, args.ssh_port)
+            )
+        _LOGGER.info(
+            "Simulating a %s outlet WattBox: HTTP on %s, telnet on %s, SSH on %s",
+            args.outlets,
+            args.http_port,
+            args.telnet_port,
+            args.ssh_port or "-",
+        )
+    elif args.mode == "record":
+        servers.append(
+            await async_record(
+                args.host, args.port, args.target, args.target_port, args.file
+            )
+        )
+        _LOGGER.info(
+            "Recording %s:%s on port %s to %s",
+            args.target,
+            args.target_port,
+            args.port,
+            args.file,
+        )
+    else:
+        servers.append(
+            await async_replay(
+                args.host, args.port, args.file, args.realtime, args.loop
+            )
+        )
+        _LOGGER.info("Replaying %s on port %s", args.file, args.port)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for server in servers:
+            if server is not None:
+                server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    simulate = modes.add_parser("simulate", help="Simulate a WattBox")
+    simulate.add_argument("--outlets", type=int, default=12)
+    simulate.add_argument("--username", default="wattbox")
+    simulate.add_argument("--password", default="wattbox")
+    simulate.add_argument("--http-port", type=int, default=8080)
+    simulate.add_argument("--telnet-port", type=int, default=2323)
+    simulate.add_argument("--ssh-port", type=int, default=0)
+    simulate.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    simulate.add_argument("--jitter", type=float, default=0.0, help="Seconds")
+    simulate.add_argument("--error-rate", type=float, default=0.0)
+    simulate.add_argument("--drop-rate", type=float, default=0.0)
+    simulate.add_argument("--seed", type=int, default=None)
+    simulate.add_argument(
+        "--push-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between outlets switched from the front panel",
+    )
+    simulate.add_argument(
+        "--push-in-response",
+        type=float,
+        default=0.0,
+        help="Chance of a front panel switch landing in a response",
+    )
+
+    record = modes.add_parser("record", help="Record a real WattBox")
+    record.add_argument("--target", required=True, help="Address of the WattBox")
+    record.add_argument("--target-port", type=int, default=23)
+    record.add_argument("--port", type=int, default=2323)
+    record.add_argument("--file", type=Path, required=True)
+
+    replay = modes.add_parser("replay", help="Replay a recording")
+    replay.add_argument("--port", type=int, default=2323)
+    replay.add_argument("--file", type=Path, required=True)
+    replay.add_argument(
+        "--realtime", action="store_true", help="Keep the recorded timing"
+    )
+    replay.add_argument(
+        "--loop", action="store_true", help="Start over after the last connection"
+    )
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()